@@ -5,6 +5,7 @@ Uploads document.json and images to blob storage, updates paths to blob URLs
 
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from azure.storage.blob import BlobServiceClient, ContentSettings
@@ -64,7 +65,7 @@ def ensure_container_exists(blob_service_client, container_name):
         return False
 
 
-def upload_file_to_blob(blob_service_client, container_name, local_path, blob_path, content_type=None):
+def upload_file_to_blob(blob_service_client, container_name, local_path, blob_path, content_type=None, metadata=None):
     """
     Upload a file to Azure Blob Storage
     
@@ -74,6 +75,7 @@ def upload_file_to_blob(blob_service_client, container_name, local_path, blob_pa
         local_path: Local file path
         blob_path: Blob path (including folder structure)
         content_type: MIME type (auto-detected if None)
+        metadata: Optional dict of string blob metadata
     
     Returns:
         Blob URL
@@ -103,13 +105,33 @@ def upload_file_to_blob(blob_service_client, container_name, local_path, blob_pa
         blob_client.upload_blob(
             data,
             overwrite=True,
-            content_settings=ContentSettings(content_type=content_type)
+            content_settings=ContentSettings(content_type=content_type),
+            metadata=metadata
         )
     
     # Return blob URL
     return blob_client.url
 
 
+def build_document_summary_metadata(document):
+    """
+    Summarize a RAG document as blob metadata (string values, well under
+    the 8 KB limit) so inspectors can read it without downloading the body
+    """
+    metadata = document['metadata']
+    block_types = {}
+    for block in document['content_blocks']:
+        block_types[block['type']] = block_types.get(block['type'], 0) + 1
+    
+    return {
+        "version": str(metadata['version']),
+        "n_blocks": str(len(document['content_blocks'])),
+        "total_images": str(metadata.get('total_images', 0)),
+        "images_described": "1" if metadata.get('images_described') else "0",
+        "block_types": ",".join(f"{t}={n}" for t, n in sorted(block_types.items()))
+    }
+
+
 def sanitize_filename(text):
     """Convert text to a safe filename"""
     # Remove special characters, replace spaces with underscores
@@ -163,10 +185,11 @@ def upload_page_to_blob(document_folder_path, update_json=True, upload_to_rag_co
     # Initialize blob service
     blob_service = get_blob_service_client()
     
-    # Ensure containers exist
+    # Ensure containers exist (one network round-trip each, so check them in parallel)
     print(f"\n📦 Checking/creating containers...")
-    ensure_container_exists(blob_service, CONTAINER_MEDIA)
-    ensure_container_exists(blob_service, CONTAINER_RAG)
+    containers = [CONTAINER_MEDIA, CONTAINER_RAG]
+    with ThreadPoolExecutor(max_workers=len(containers)) as executor:
+        list(executor.map(lambda name: ensure_container_exists(blob_service, name), containers))
     
     # Base paths in blob storage
     media_base_path = f"{space_key}/{page_id}/v{version}"
@@ -242,7 +265,8 @@ def upload_page_to_blob(document_folder_path, update_json=True, upload_to_rag_co
             CONTAINER_RAG,
             str(doc_json_path),
             rag_blob_path,
-            content_type='application/json'
+            content_type='application/json',
+            metadata=build_document_summary_metadata(document)
         )
         
         uploaded_files.append({
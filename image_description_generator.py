@@ -4,24 +4,99 @@ Specialized prompts for flowcharts, tables, diagrams, and screenshots
 """
 
 import os
+import io
+import re
 import json
+import logging
 import base64
+import hashlib
+import mimetypes
+import random
+import string
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import (
+    AzureOpenAI,
+    RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+)
+
+# orjson reads/writes document.json as bytes and much faster; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Image content hashing: BLAKE3 (SIMD) when installed, else BLAKE2b from hashlib.
+# Hashes carry an algorithm prefix so keys from different hashers never collide.
+try:
+    from blake3 import blake3 as _new_image_hasher
+    IMAGE_HASH_ALGO = "blake3"
+except ImportError:
+    def _new_image_hasher():
+        return hashlib.blake2b(digest_size=32)
+    IMAGE_HASH_ALGO = "blake2b"
+
+# Pillow downscales oversized local images before they are encoded; without it
+# images are sent as-is
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 # Load environment variables
 load_dotenv()
 
+# Per-image progress goes to the logger (worker results arrive interleaved);
+# describe_images_in_document prints one summary line per page
+logger = logging.getLogger(__name__)
+
 # Azure OpenAI configuration
 client = AzureOpenAI(
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+    max_retries=0  # retries are handled by call_vision
 )
 
 DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
 
+# Max Vision calls in flight per document (bounded by the deployment's rate limits)
+DESCRIPTION_MAX_WORKERS = int(os.getenv("GPT4O_CONCURRENCY", "8"))
+
+# Vision call retries on rate limits, timeouts, connection errors and 5xx:
+# the server's Retry-After when given, else exponential backoff
+# (0.5s, 1s, 2s, 4s, ... capped) plus jitter
+VISION_MAX_ATTEMPTS = 5
+VISION_RETRY_BASE_DELAY = 0.5
+VISION_RETRY_MAX_DELAY = 16
+RETRYABLE_VISION_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Images of the same type sent together in one Vision call (1 = one call per image)
+DESCRIPTION_BATCH_SIZE = max(1, int(os.getenv("IMAGE_DESCRIPTION_BATCH_SIZE", "1")))
+
+# Completion token limit of the Vision deployment; batches are sized so their
+# combined response budget fits under it
+VISION_MAX_OUTPUT_TOKENS = int(os.getenv("VISION_MAX_OUTPUT_TOKENS", "4096"))
+
+# In-process LRU of successful descriptions, keyed by image type + image content
+# hash (or URL), so an image repeated across pages in one run is described once
+DESCRIPTION_CACHE_SIZE = 4096
+HASH_CHUNK_SIZE = 1 << 20
+_description_cache = OrderedDict()
+_description_cache_lock = threading.Lock()
+
+# Per-page manifest of finished descriptions ({cache_key: {description, image_type}}),
+# kept next to document.json so later runs reuse them with a single file read
+DESCRIPTION_MANIFEST_NAME = "image_descriptions.json"
+
 
 # Specialized prompts for different image types
 PROMPTS = {
@@ -96,11 +171,244 @@ Format your response to capture the complete information content of this diagram
 Provide a thorough description that would allow someone to understand the image content without seeing it."""
 }
 
+# Prompt + context suffix, prepared once per type; only the context is filled per call
+_PROMPT_WITH_CONTEXT_TEMPLATES = {
+    image_type: string.Template(prompt.replace("$", "$$") + "\n\nAdditional context about this image:\n$context")
+    for image_type, prompt in PROMPTS.items()
+}
+
+# Response budget per image type; tables need the most room for extracted cells
+IMAGE_TYPE_MAX_TOKENS = {
+    "table": 1500,
+    "flowchart": 1200,
+    "diagram": 1200,
+    "screenshot": 800,
+    "general": 1000,
+}
+DEFAULT_MAX_TOKENS = 1200
+
+# Deterministic output: the same image regenerates the same description
+DESCRIPTION_TEMPERATURE = 0
+
+# Wraps a type prompt when several images are described in one call
+BATCH_PROMPT_HEADER = """You will be shown {n} images, labelled Image 1 to Image {n} in the order given.
+Describe EACH image separately, following the instructions below for every image.
+Start each image's description with a line containing only "### Image <number>" (e.g. "### Image 1").
+
+"""
+
+# Splits a batched response into its per-image sections
+_BATCH_SECTION_RE = re.compile(r'^###\s*Image\s+(\d+)\s*$', re.MULTILINE)
+
+
+# Read size for streaming base64; a multiple of 3 so no block needs padding
+B64_READ_SIZE = 57 * 1024
+
+
+def _b64_encode_file(image_path: str, prefix: bytes = b"") -> bytearray:
+    """Base64-encode a file block by block into one buffer, after an optional prefix"""
+    encoded = bytearray(prefix)
+    with open(image_path, "rb", buffering=1 << 20) as image_file:
+        while chunk := image_file.read(B64_READ_SIZE):
+            encoded += base64.b64encode(chunk)
+    return encoded
+
 
 def encode_image_to_base64(image_path: str) -> str:
-    """Read image file and encode to base64"""
+    """Read image file and encode to base64, block by block so the whole raw file is never held alongside its encoding"""
+    return _b64_encode_file(image_path).decode("ascii")
+
+
+# Longest side sent to Vision; larger images only add 512px tiles (and tokens), not detail
+MAX_IMAGE_DIMENSION = 2048
+
+# Formats re-encoded after downscaling; the media type stays the same
+_DOWNSCALE_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
+def _downscale_if_needed(image_path: str) -> Optional[bytes]:
+    """
+    Return the image re-encoded at MAX_IMAGE_DIMENSION on its long side.
+    None means "send the original": it already fits, the format isn't
+    resized, Pillow isn't installed, or Pillow failed to process it.
+    """
+    fmt = _DOWNSCALE_FORMATS.get(Path(image_path).suffix.lower())
+    if Image is None or fmt is None:
+        return None
+    try:
+        with Image.open(image_path) as im:
+            if max(im.size) <= MAX_IMAGE_DIMENSION:
+                return None
+            im.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+            if fmt == 'JPEG' and im.mode not in ('RGB', 'L'):
+                im = im.convert('RGB')
+            buf = io.BytesIO()
+            if fmt == 'PNG':
+                im.save(buf, format=fmt, optimize=True)
+            else:
+                im.save(buf, format=fmt, quality=85)
+            return buf.getvalue()
+    except Exception:
+        return None
+
+
+def encode_image_to_data_url(image_path: str, media_type: str) -> str:
+    """Build the data: URL for a local image (downscaled first if oversized); the base64 payload is written straight after the header"""
+    prefix = f"data:{media_type};base64,".encode("ascii")
+    downscaled = _downscale_if_needed(image_path)
+    if downscaled is not None:
+        return (prefix + base64.b64encode(downscaled)).decode("ascii")
+    return _b64_encode_file(image_path, prefix).decode("ascii")
+
+
+@dataclass
+class DescriptionStats:
+    """Per-run description counters; record() is safe to call from worker threads"""
+    from_cache: int = 0
+    generated: int = 0
+    failed: int = 0
+    tokens_used: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    
+    def record(self, result: dict):
+        with self._lock:
+            if not result.get('success'):
+                self.failed += 1
+            elif result.get('from_cache'):
+                self.from_cache += 1
+            else:
+                self.generated += 1
+            self.tokens_used += result.get('tokens_used') or 0
+    
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "from_cache": self.from_cache,
+                "generated": self.generated,
+                "failed": self.failed,
+                "tokens_used": self.tokens_used
+            }
+
+
+def compute_image_hash(image_path: str) -> str:
+    """Content hash of an image file ('<algo>:<hex>'), read in 1 MiB chunks"""
+    h = _new_image_hasher()
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+        while chunk := image_file.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return f"{IMAGE_HASH_ALGO}:{h.hexdigest()}"
+
+
+def get_cached_description(cache_key: str) -> dict:
+    """Return a cached description result (tokens_used=0) or None"""
+    with _description_cache_lock:
+        result = _description_cache.get(cache_key)
+        if result is None:
+            return None
+        _description_cache.move_to_end(cache_key)
+    return {**result, "tokens_used": 0, "from_cache": True}
+
+
+def get_cached_descriptions(cache_keys: list) -> dict:
+    """Bulk lookup: {cache_key: cached result} for every key that is cached"""
+    with _description_cache_lock:
+        hits = {}
+        for cache_key in cache_keys:
+            result = _description_cache.get(cache_key)
+            if result is not None:
+                _description_cache.move_to_end(cache_key)
+                hits[cache_key] = {**result, "tokens_used": 0, "from_cache": True}
+    return hits
+
+
+def cache_description(cache_key: str, result: dict):
+    """Store a successful description result, evicting the least recently used"""
+    with _description_cache_lock:
+        _description_cache[cache_key] = result
+        _description_cache.move_to_end(cache_key)
+        if len(_description_cache) > DESCRIPTION_CACHE_SIZE:
+            _description_cache.popitem(last=False)
+
+
+def clear_description_cache():
+    """Drop all cached descriptions"""
+    with _description_cache_lock:
+        _description_cache.clear()
+
+
+def load_description_manifest(page_folder: Path) -> dict:
+    """Load a page's description manifest; {} if missing or unreadable"""
+    manifest_path = Path(page_folder) / DESCRIPTION_MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        data = manifest_path.read_bytes()
+        return orjson.loads(data) if orjson else json.loads(data)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_description_manifest(page_folder: Path, manifest: dict):
+    """Write a page's description manifest"""
+    manifest_path = Path(page_folder) / DESCRIPTION_MANIFEST_NAME
+    if orjson:
+        manifest_path.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+    else:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+# Formats the Vision endpoint accepts
+_MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp"
+}
+
+
+@lru_cache(maxsize=64)
+def _guess_image_media_type(ext: str) -> Optional[str]:
+    """mimetypes lookup for extensions outside _MEDIA_TYPES; non-image guesses are ignored"""
+    guessed, _ = mimetypes.guess_type(f"image{ext}")
+    return guessed if guessed and guessed.startswith("image/") else None
+
+
+def get_media_type(image_path: str) -> Optional[str]:
+    """
+    Media type for a local image, from its extension. None for image formats
+    Vision rejects (e.g. BMP, SVG); unknown extensions are sent as PNG.
+    """
+    ext = Path(image_path).suffix.lower()
+    if ext in _MEDIA_TYPES:
+        return _MEDIA_TYPES[ext]
+    return None if _guess_image_media_type(ext) else "image/png"
+
+
+def _unsupported_format_result(image_path, image_type: str) -> dict:
+    """Failure result for a local image in a format Vision won't accept (no call is made)"""
+    guessed = _guess_image_media_type(Path(image_path).suffix.lower())
+    return {"success": False, "error": f"Unsupported image format: {guessed}", "image_type": image_type}
+
+
+# Keywords that identify each image type, in priority order
+IMAGE_TYPE_KEYWORDS = [
+    ("table", ['table', 'matrix', 'raci', 'responsibility', 'grid', 'spreadsheet']),
+    ("flowchart", ['flow', 'process', 'workflow', 'pipeline', 'sequence']),
+    ("screenshot", ['screenshot', 'screen', 'email', 'ui', 'interface', 'app']),
+    ("diagram", ['diagram', 'architecture', 'structure', 'org', 'hierarchy']),
+]
+
+# One named group per type inside a lookahead, so a single scan reports every
+# position where any keyword starts (overlapping keywords are not swallowed)
+_IMAGE_TYPE_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{image_type}>{'|'.join(map(re.escape, keywords))})"
+        for image_type, keywords in IMAGE_TYPE_KEYWORDS
+    ) + ")",
+    re.IGNORECASE
+)
 
 
 def detect_image_type(filename: str, context: str = "") -> str:
@@ -108,34 +416,74 @@ def detect_image_type(filename: str, context: str = "") -> str:
     Detect the likely type of image based on filename and context.
     Returns: 'flowchart', 'table', 'screenshot', 'diagram', or 'general'
     """
-    filename_lower = filename.lower()
-    context_lower = context.lower() if context else ""
-    
-    # Check for table indicators
-    table_keywords = ['table', 'matrix', 'raci', 'responsibility', 'grid', 'spreadsheet']
-    if any(kw in filename_lower or kw in context_lower for kw in table_keywords):
-        return "table"
+    haystack = f"{filename}\n{context}" if context else filename
+    found = {match.lastgroup for match in _IMAGE_TYPE_RE.finditer(haystack)}
     
-    # Check for flowchart indicators
-    flow_keywords = ['flow', 'process', 'workflow', 'pipeline', 'sequence']
-    if any(kw in filename_lower or kw in context_lower for kw in flow_keywords):
-        return "flowchart"
-    
-    # Check for screenshot indicators
-    screenshot_keywords = ['screenshot', 'screen', 'email', 'ui', 'interface', 'app']
-    if any(kw in filename_lower or kw in context_lower for kw in screenshot_keywords):
-        return "screenshot"
-    
-    # Check for diagram indicators
-    diagram_keywords = ['diagram', 'architecture', 'structure', 'org', 'hierarchy']
-    if any(kw in filename_lower or kw in context_lower for kw in diagram_keywords):
-        return "diagram"
+    for image_type, _ in IMAGE_TYPE_KEYWORDS:
+        if image_type in found:
+            return image_type
     
     # Default to general
     return "general"
 
 
-def describe_image(image_path: str, image_type: str = None, context: str = "") -> dict:
+def build_prompt(image_type: str, context: str = "") -> str:
+    """Get the prompt for an image type, with the surrounding context appended"""
+    if not context:
+        return PROMPTS.get(image_type, PROMPTS["general"])
+    
+    # Add context in a single substitution into the prepared template
+    template = _PROMPT_WITH_CONTEXT_TEMPLATES.get(image_type, _PROMPT_WITH_CONTEXT_TEMPLATES["general"])
+    return template.substitute(context=context)
+
+
+def build_vision_messages(prompt: str, image_url: str) -> list:
+    """Chat messages for one Vision request; image_url may be a data: URL"""
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_url,
+                        "detail": "high"  # Use high detail for complex diagrams/tables
+                    }
+                }
+            ]
+        }
+    ]
+
+
+def _retry_delay(attempt: int, error: Exception = None) -> float:
+    """Backoff before retry number `attempt` (0-based): Retry-After if the error carries one, else exponential with jitter"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(VISION_RETRY_MAX_DELAY, float(response.headers.get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return min(VISION_RETRY_MAX_DELAY, VISION_RETRY_BASE_DELAY * (2 ** attempt)) + random.uniform(0, VISION_RETRY_BASE_DELAY)
+
+
+def call_vision(messages: list, max_tokens: int):
+    """GPT-4o Vision chat completion, retried on transient errors; other errors raise immediately"""
+    for attempt in range(VISION_MAX_ATTEMPTS):
+        try:
+            return client.chat.completions.create(
+                model=DEPLOYMENT_NAME,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=DESCRIPTION_TEMPERATURE
+            )
+        except RETRYABLE_VISION_ERRORS as e:
+            if attempt == VISION_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(_retry_delay(attempt, e))
+
+
+def describe_image(image_path: str, image_type: str = None, context: str = "", image_hash: str = None) -> dict:
     """
     Generate a detailed description of an image using GPT-4o Vision.
     
@@ -144,6 +492,7 @@ def describe_image(image_path: str, image_type: str = None, context: str = "") -
         image_type: Type of image ('flowchart', 'table', 'screenshot', 'diagram', 'general')
                    If None, will auto-detect
         context: Additional context about the image (e.g., surrounding text)
+        image_hash: Precomputed compute_image_hash(image_path), if already known
     
     Returns:
         dict with 'description', 'image_type', 'success', 'error'
@@ -158,56 +507,38 @@ def describe_image(image_path: str, image_type: str = None, context: str = "") -
         if image_type is None:
             image_type = detect_image_type(filename, context)
         
-        # Get the appropriate prompt
-        prompt = PROMPTS.get(image_type, PROMPTS["general"])
+        media_type = get_media_type(image_path)
+        if media_type is None:
+            return _unsupported_format_result(image_path, image_type)
         
-        # Add context if provided
-        if context:
-            prompt += f"\n\nAdditional context about this image:\n{context}"
+        # Same image content already described this run?
+        cache_key = f"{image_type}:{image_hash or compute_image_hash(image_path)}"
+        cached = get_cached_description(cache_key)
+        if cached:
+            return cached
         
-        # Encode image
-        base64_image = encode_image_to_base64(image_path)
+        # Get the appropriate prompt
+        prompt = build_prompt(image_type, context)
         
-        # Determine media type
-        ext = Path(image_path).suffix.lower()
-        media_type = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp"
-        }.get(ext, "image/png")
+        # Encode image as a data URL
+        data_url = encode_image_to_data_url(image_path, media_type)
         
         # Call GPT-4o Vision
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{media_type};base64,{base64_image}",
-                                "detail": "high"  # Use high detail for complex diagrams/tables
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.3  # Lower temperature for more consistent descriptions
+        response = call_vision(
+            build_vision_messages(prompt, data_url),
+            IMAGE_TYPE_MAX_TOKENS.get(image_type, DEFAULT_MAX_TOKENS)
         )
         
         description = response.choices[0].message.content
         
-        return {
+        result = {
             "success": True,
             "description": description,
             "image_type": image_type,
             "tokens_used": response.usage.total_tokens if response.usage else None
         }
+        cache_description(cache_key, result)
+        return result
         
     except Exception as e:
         return {
@@ -236,43 +567,30 @@ def describe_image_from_url(image_url: str, image_type: str = None, context: str
         if image_type is None:
             image_type = detect_image_type(filename, context)
         
-        # Get the appropriate prompt
-        prompt = PROMPTS.get(image_type, PROMPTS["general"])
+        cache_key = f"{image_type}:{image_url}"
+        cached = get_cached_description(cache_key)
+        if cached:
+            return cached
         
-        # Add context if provided
-        if context:
-            prompt += f"\n\nAdditional context about this image:\n{context}"
+        # Get the appropriate prompt
+        prompt = build_prompt(image_type, context)
         
         # Call GPT-4o Vision with URL directly
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": image_url,
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.3
+        response = call_vision(
+            build_vision_messages(prompt, image_url),
+            IMAGE_TYPE_MAX_TOKENS.get(image_type, DEFAULT_MAX_TOKENS)
         )
         
         description = response.choices[0].message.content
         
-        return {
+        result = {
             "success": True,
             "description": description,
             "image_type": image_type,
             "tokens_used": response.usage.total_tokens if response.usage else None
         }
+        cache_description(cache_key, result)
+        return result
         
     except Exception as e:
         return {
@@ -282,6 +600,96 @@ def describe_image_from_url(image_url: str, image_type: str = None, context: str
         }
 
 
+def batch_size_for(image_type: str) -> int:
+    """Images of this type per Vision call, capped so the batch's response fits VISION_MAX_OUTPUT_TOKENS"""
+    per_image = IMAGE_TYPE_MAX_TOKENS.get(image_type, DEFAULT_MAX_TOKENS)
+    return max(1, min(DESCRIPTION_BATCH_SIZE, VISION_MAX_OUTPUT_TOKENS // per_image))
+
+
+def describe_images_batch(items: list, image_type: str) -> list:
+    """
+    Describe several images of the same type in a single GPT-4o Vision call.
+    Falls back to one call per image if the response can't be split per image.
+    Transient Vision errors that outlast call_vision's retries are raised
+    rather than retried image by image.
+    
+    Args:
+        items: dicts with 'image_path' (local file) or 'image_url', plus optional
+               'context' and 'image_hash'
+        image_type: Shared image type for the batch (selects the prompt)
+    
+    Returns:
+        List of result dicts (same shape as describe_image), in the order of items
+    """
+    def describe_one(item):
+        if item.get('image_path'):
+            return describe_image(item['image_path'], image_type=image_type,
+                                  context=item.get('context', ""), image_hash=item.get('image_hash'))
+        return describe_image_from_url(item['image_url'], image_type=image_type, context=item.get('context', ""))
+    
+    if len(items) == 1:
+        return [describe_one(items[0])]
+    
+    try:
+        prompt = BATCH_PROMPT_HEADER.format(n=len(items)) + PROMPTS.get(image_type, PROMPTS["general"])
+        contexts = [f"Image {i}: {item['context']}" for i, item in enumerate(items, 1) if item.get('context')]
+        if contexts:
+            prompt += "\n\nAdditional context about these images:\n" + "\n".join(contexts)
+        
+        content = [{"type": "text", "text": prompt}]
+        cache_keys = []
+        for item in items:
+            if item.get('image_path'):
+                media_type = get_media_type(item['image_path'])
+                if media_type is None:
+                    raise ValueError(f"Unsupported image format: {item['image_path']}")
+                url = encode_image_to_data_url(item['image_path'], media_type)
+                cache_keys.append(f"{image_type}:{item.get('image_hash') or compute_image_hash(item['image_path'])}")
+            else:
+                url = item['image_url']
+                cache_keys.append(f"{image_type}:{url}")
+            content.append({"type": "image_url", "image_url": {"url": url, "detail": "high"}})
+        
+        response = call_vision(
+            [{"role": "user", "content": content}],
+            min(VISION_MAX_OUTPUT_TOKENS, IMAGE_TYPE_MAX_TOKENS.get(image_type, DEFAULT_MAX_TOKENS) * len(items))
+        )
+        
+        parts = _BATCH_SECTION_RE.split(response.choices[0].message.content or "")
+        sections = {int(number): text.strip() for number, text in zip(parts[1::2], parts[2::2])}
+        if sorted(sections) != list(range(1, len(items) + 1)) or not all(sections.values()):
+            return [describe_one(item) for item in items]
+    
+    except RETRYABLE_VISION_ERRORS:
+        # Retries are exhausted; one call per image would only hit the same limit
+        raise
+    except Exception:
+        # A bad file or a rejected batch shouldn't fail the whole group
+        return [describe_one(item) for item in items]
+    
+    tokens_used = response.usage.total_tokens if response.usage else 0
+    results = []
+    for i, cache_key in enumerate(cache_keys):
+        result = {
+            "success": True,
+            "description": sections[i + 1],
+            "image_type": image_type,
+            # Whole-call usage is booked on the first image so totals stay exact
+            "tokens_used": tokens_used if i == 0 else 0
+        }
+        cache_description(cache_key, result)
+        results.append(result)
+    return results
+
+
+def _batch_results(future, image_type: str, blocks: list) -> list:
+    """Results of a describe_images_batch future; a batch that ran out of retries fails each of its images"""
+    try:
+        return future.result()
+    except RETRYABLE_VISION_ERRORS as e:
+        return [{"success": False, "error": str(e), "image_type": image_type} for _ in blocks]
+
+
 def describe_images_in_document(document_json_path: str, update_document: bool = True) -> dict:
     """
     Process all images in a document.json and add descriptions.
@@ -296,18 +704,24 @@ def describe_images_in_document(document_json_path: str, update_document: bool =
     doc_path = Path(document_json_path)
     
     # Load document
-    with open(doc_path, 'r', encoding='utf-8') as f:
-        document = json.load(f)
+    if orjson:
+        document = orjson.loads(doc_path.read_bytes())
+    else:
+        with open(doc_path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
     
     base_folder = doc_path.parent
     results = {}
-    total_tokens = 0
+    stats = DescriptionStats()
     
     print(f"\n{'='*70}")
     print(f"Processing images in: {document['metadata']['title']}")
     print(f"{'='*70}")
     
-    # Process each content block
+    # Pass 1: collect the images to describe along with their context.
+    # Index blocks once so each image's context is two lookups, not a full scan.
+    blocks_by_index = {b['index']: b for b in document['content_blocks']}
+    pending = []
     for block in document['content_blocks']:
         if block['type'] == 'image':
             # Handle both local files and external URLs
@@ -316,57 +730,128 @@ def describe_images_in_document(document_json_path: str, update_document: bool =
             
             if not has_local and not has_external:
                 continue
-                
-            filename = block.get('filename', 'unknown')
-            index = block.get('index', 0)
             
-            print(f"\n📷 [{index:02d}] Processing: {filename}")
+            index = block.get('index', 0)
             
             # Get context from surrounding blocks
             context_parts = []
             
-            # Look for text/heading before this image
-            for prev_block in document['content_blocks']:
-                if prev_block['index'] < index and prev_block['index'] >= index - 2:
-                    if prev_block['type'] == 'heading':
-                        context_parts.append(f"Section: {prev_block['content']}")
-                    elif prev_block['type'] == 'text':
-                        context_parts.append(prev_block['content'][:200])
+            # Look for text/heading in the two blocks before this image
+            for prev_index in (index - 2, index - 1):
+                prev_block = blocks_by_index.get(prev_index)
+                if prev_block is None:
+                    continue
+                if prev_block['type'] == 'heading':
+                    context_parts.append(f"Section: {prev_block['content']}")
+                elif prev_block['type'] == 'text':
+                    context_parts.append(prev_block['content'][:200])
             
             # Add alt_text as context if available
             if block.get('alt_text'):
                 context_parts.append(f"Alt text: {block['alt_text']}")
             
             context = " | ".join(context_parts) if context_parts else ""
-            
-            # Generate description based on source type
-            if has_local:
-                image_path = base_folder / block['local_path']
-                result = describe_image(str(image_path), context=context)
+            pending.append((block, context))
+    
+    # Pass 2: resolve cache hits in one bulk lookup (local images hashed in
+    # parallel), then run the Vision calls for the misses concurrently.
+    # Blocks and totals are only updated here on the calling thread.
+    with ThreadPoolExecutor(max_workers=DESCRIPTION_MAX_WORKERS) as executor:
+        local_paths = [base_folder / block['local_path'] if block.get('local_path') else None for block, _ in pending]
+        image_hashes = list(executor.map(
+            lambda path: compute_image_hash(path) if path and path.exists() else None, local_paths
+        ))
+        
+        image_types = []
+        cache_keys = []
+        for (block, context), image_path, image_hash in zip(pending, local_paths, image_hashes):
+            if image_path:
+                image_type = detect_image_type(image_path.name, context)
+                cache_keys.append(f"{image_type}:{image_hash}" if image_hash else None)
+            else:
+                image_type = detect_image_type(block['external_url'].split('/')[-1].split('?')[0], context)
+                cache_keys.append(f"{image_type}:{block['external_url']}")
+            image_types.append(image_type)
+        cached_map = get_cached_descriptions([key for key in cache_keys if key])
+        
+        # Anything not in memory may be in this page's manifest from an earlier run
+        manifest = load_description_manifest(base_folder)
+        for cache_key in cache_keys:
+            if cache_key and cache_key not in cached_map and cache_key in manifest:
+                entry = {"success": True, **manifest[cache_key]}
+                cache_description(cache_key, entry)
+                cached_map[cache_key] = {**entry, "tokens_used": 0, "from_cache": True}
+        block_cache_keys = {id(block): cache_key for (block, _), cache_key in zip(pending, cache_keys)}
+        manifest_changed = False
+        
+        # Group misses by image type so a batch shares one prompt
+        cache_hits = []
+        unsupported = []
+        misses_by_type = {}
+        for (block, context), image_path, image_hash, image_type, cache_key in zip(
+                pending, local_paths, image_hashes, image_types, cache_keys):
+            if cache_key in cached_map:
+                cache_hits.append((block, cached_map[cache_key]))
+                continue
+            if image_path and get_media_type(image_path) is None:
+                # Vision rejects this format; don't spend a call on it
+                unsupported.append((block, _unsupported_format_result(image_path, image_type)))
+                continue
+            item = {"context": context}
+            if image_path:
+                item.update(image_path=str(image_path), image_hash=image_hash)
             else:
                 # External URL - use the URL directly
-                print(f"   🌐 External URL: {has_external[:60]}...")
-                result = describe_image_from_url(has_external, context=context)
+                item["image_url"] = block['external_url']
+            misses_by_type.setdefault(image_type, []).append((block, item))
+        
+        futures = {}
+        for image_type, misses in misses_by_type.items():
+            batch_size = batch_size_for(image_type)
+            for i in range(0, len(misses), batch_size):
+                batch = misses[i:i + batch_size]
+                future = executor.submit(describe_images_batch, [item for _, item in batch], image_type)
+                futures[future] = (image_type, [block for block, _ in batch])
+        
+        completed = (
+            pair for future in as_completed(futures)
+            for pair in zip(futures[future][1], _batch_results(future, *futures[future]))
+        )
+        for block, result in chain(cache_hits, unsupported, completed):
+            filename = block.get('filename', 'unknown')
             
+            stats.record(result)
             if result['success']:
                 block['description'] = result['description']
                 block['description_type'] = result['image_type']
-                total_tokens += result.get('tokens_used', 0)
                 
-                print(f"   ✅ Described as: {result['image_type']}")
-                print(f"   📝 Preview: {result['description'][:100]}...")
+                cache_key = block_cache_keys.get(id(block))
+                if cache_key and cache_key not in manifest:
+                    manifest[cache_key] = {"description": result['description'], "image_type": result['image_type']}
+                    manifest_changed = True
+                
+                source = "cache" if result.get('from_cache') else "GPT-4o"
+                logger.info("[%02d] %s: described as %s (%s)", block.get('index', 0), filename, result['image_type'], source)
             else:
-                print(f"   ❌ Error: {result.get('error', 'Unknown error')}")
+                logger.warning("[%02d] %s: %s", block.get('index', 0), filename, result.get('error', 'Unknown error'))
             
             results[filename] = result
     
+    if manifest_changed:
+        save_description_manifest(base_folder, manifest)
+    
+    total_tokens = stats.tokens_used
+    
     # Update document with descriptions
     if update_document:
         document['metadata']['images_described'] = True
         document['metadata']['description_tokens_used'] = total_tokens
         
-        with open(doc_path, 'w', encoding='utf-8') as f:
-            json.dump(document, f, indent=2, ensure_ascii=False)
+        if orjson:
+            doc_path.write_bytes(orjson.dumps(document, option=orjson.OPT_INDENT_2))
+        else:
+            with open(doc_path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
         
         print(f"\n✅ Updated: {doc_path}")
         
@@ -376,11 +861,14 @@ def describe_images_in_document(document_json_path: str, update_document: bool =
             update_readable_file(document, readable_path)
             print(f"✅ Updated: {readable_path}")
     
-    print(f"\n📊 Total tokens used: {total_tokens:,}")
+    page_id = document['metadata'].get('page_id')
+    logger.info("page=%s images=%d cached=%d generated=%d failed=%d tokens=%d",
+                page_id, len(results), stats.from_cache, stats.generated, stats.failed, total_tokens)
     
     return {
         "images_processed": len(results),
         "total_tokens": total_tokens,
+        "stats": stats.as_dict(),
         "results": results
     }
 
@@ -443,6 +931,8 @@ def update_readable_file(document: dict, readable_path: Path):
 
 def main():
     """Main entry point - process the ProPM Roles & Responsibilities page"""
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.INFO)
     
     print("=" * 70)
     print("GPT-4o IMAGE DESCRIPTION GENERATOR")
@@ -117,6 +117,7 @@ import os
 import sys
 import json
 import argparse
+import logging
 from datetime import datetime
 
 # Fix Windows console encoding for Unicode/emojis
@@ -481,6 +482,10 @@ Examples:
     
     args = parser.parse_args()
     
+    # Per-image progress from the description step; other libraries stay at WARNING
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("image_description_generator").setLevel(logging.INFO)
+    
     result = run_pipeline(
         force_reprocess=args.force,
         email_only=args.email_only
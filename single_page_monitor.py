@@ -8,6 +8,7 @@ import os
 import json
 import hashlib
 import requests
+import xxhash
 from datetime import datetime
 from dotenv import load_dotenv
 from requests.auth import HTTPBasicAuth
@@ -29,6 +30,16 @@ AUTH = HTTPBasicAuth(CONFLUENCE_EMAIL, CONFLUENCE_API_TOKEN)
 # Azure Blob Storage
 STORAGE_CONNECTION_STRING = os.getenv("BLOB_STORAGE_CONNECTION_STRING")
 CONTAINER_STATE = "confluence-state"
+HISTORY_VERSIONS_TO_KEEP = int(os.getenv("HISTORY_VERSIONS_TO_KEEP", "0"))  # 0 keeps all history
+BLOB_BATCH_SIZE = 256  # Max sub-requests per Blob Batch call
+
+# Content hashing
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+HASH_ALGO_SHA256 = "sha256"
+HASH_ALGO_XXH3 = "xxh3_128"
+# The hash only detects changes (no adversary), so new state uses fast non-cryptographic xxh3;
+# SHA-256 remains for comparing against state saved by earlier versions
+DEDUP_HASH_ALGO = HASH_ALGO_XXH3
 
 # Disable SSL warnings
 import urllib3
@@ -43,6 +54,24 @@ def get_blob_service_client():
     )
 
 
+def compute_content_hash(data: bytes, algo: str = None) -> str:
+    """
+    Hex digest of data using the given scheme (DEDUP_HASH_ALGO if None).
+    Plain SHA-256 is fed to hashlib in 1 MiB chunks so large pages
+    don't hold the GIL for one long update.
+    """
+    if algo is None:
+        algo = DEDUP_HASH_ALGO
+    if algo == HASH_ALGO_XXH3:
+        return xxhash.xxh3_128_hexdigest(data)
+    
+    h = hashlib.sha256()
+    mv = memoryview(data)
+    for offset in range(0, len(mv), HASH_CHUNK_SIZE):
+        h.update(mv[offset:offset + HASH_CHUNK_SIZE])
+    return h.hexdigest()
+
+
 def extract_raw_text(page_id):
     """
     Extract raw text content from page using Confluence API
@@ -100,7 +129,8 @@ def extract_raw_text(page_id):
     raw_text = f"TITLE: {title}\nVERSION: {version}\n\n{text}"
     
     # Calculate hash for quick comparison
-    content_hash = hashlib.sha256(raw_text.encode()).hexdigest()
+    hash_algo = DEDUP_HASH_ALGO
+    content_hash = compute_content_hash(raw_text.encode(), hash_algo)
     
     print(f"   Title: {title}")
     print(f"   Version: {version}")
@@ -110,6 +140,7 @@ def extract_raw_text(page_id):
     return {
         'raw_text': raw_text,
         'content_hash': content_hash,
+        'hash_algo': hash_algo,
         'extracted_at': datetime.utcnow().isoformat(),
         'page_id': page_id,
         'confluence_version': version
@@ -142,6 +173,28 @@ def load_previous_version(page_id):
         return None
 
 
+def load_previous_version_metadata(page_id):
+    """
+    Read the hash/version metadata of the last processed version with a
+    HEAD request (get_blob_properties), without downloading the body
+    Returns: metadata dict or None if unavailable
+    """
+    try:
+        blob_service = get_blob_service_client()
+        container_client = blob_service.get_container_client(CONTAINER_STATE)
+        
+        blob_name = f"page_{page_id}_raw_version.json"
+        blob_client = container_client.get_blob_client(blob_name)
+        
+        metadata = blob_client.get_blob_properties().metadata or {}
+        if 'content_hash' in metadata and 'version_number' in metadata:
+            return metadata
+        return None
+    
+    except Exception:
+        return None
+
+
 def save_current_version(page_id, raw_data, version_number):
     """
     Save current version to blob storage
@@ -161,17 +214,23 @@ def save_current_version(page_id, raw_data, version_number):
             'page_id': page_id,
             'version_number': version_number,
             'content_hash': raw_data['content_hash'],
+            'hash_algo': raw_data.get('hash_algo', HASH_ALGO_SHA256),
             'raw_text': raw_data['raw_text'],
             'extracted_at': raw_data['extracted_at'],
             'confluence_version': raw_data['confluence_version']
         }
         
-        # Save current version
+        # Save current version (hash in metadata allows HEAD-only checks next run)
         blob_name = f"page_{page_id}_raw_version.json"
         blob_client = container_client.get_blob_client(blob_name)
         blob_client.upload_blob(
             json.dumps(version_data, indent=2),
-            overwrite=True
+            overwrite=True,
+            metadata={
+                'content_hash': version_data['content_hash'],
+                'hash_algo': version_data['hash_algo'],
+                'version_number': str(version_number)
+            }
         )
         
         # Also save to history
@@ -183,6 +242,9 @@ def save_current_version(page_id, raw_data, version_number):
         )
         
         print(f"[OK] Saved version v{version_number} to blob storage")
+        
+        if HISTORY_VERSIONS_TO_KEEP > 0:
+            cleanup_old_versions(page_id, keep=HISTORY_VERSIONS_TO_KEEP)
         return True
     
     except Exception as e:
@@ -190,6 +252,35 @@ def save_current_version(page_id, raw_data, version_number):
         return False
 
 
+def cleanup_old_versions(page_id, keep=5):
+    """
+    Delete all but the newest `keep` history blobs for a page,
+    using Blob Batch requests of up to 256 deletes each
+    Returns: number of blobs deleted
+    """
+    try:
+        blob_service = get_blob_service_client()
+        container_client = blob_service.get_container_client(CONTAINER_STATE)
+        
+        history = sorted(
+            container_client.list_blobs(name_starts_with=f"page_{page_id}_history/"),
+            key=lambda blob: blob.last_modified,
+            reverse=True
+        )
+        stale = [blob.name for blob in history[keep:]]
+        
+        for start in range(0, len(stale), BLOB_BATCH_SIZE):
+            container_client.delete_blobs(*stale[start:start + BLOB_BATCH_SIZE])
+        
+        if stale:
+            print(f"[OK] Removed {len(stale)} old history version(s), kept {min(keep, len(history))}")
+        return len(stale)
+    
+    except Exception as e:
+        print(f"[WARN] Failed to clean up old versions: {e}")
+        return 0
+
+
 def detect_changes_optimized(page_id):
     """
     Optimized change detection using text comparison
@@ -210,10 +301,27 @@ def detect_changes_optimized(page_id):
     # Step 1: Extract current raw text
     current_data = extract_raw_text(page_id)
     
-    # Step 2: Load previous version
-    previous_version = load_previous_version(page_id)
+    # Step 2: Load previous version - HEAD first, only download the body if the hash differs
+    previous_meta = load_previous_version_metadata(page_id)
+    if (previous_meta
+            and previous_meta.get('hash_algo', HASH_ALGO_SHA256) == current_data['hash_algo']
+            and previous_meta['content_hash'] == current_data['content_hash']):
+        previous_version = {
+            'version_number': int(previous_meta['version_number']),
+            'content_hash': previous_meta['content_hash'],
+            'hash_algo': current_data['hash_algo']
+        }
+    else:
+        previous_version = load_previous_version(page_id)
+    
+    # Step 3: Compare (re-hash current text if the stored hash used another scheme)
+    if previous_version is not None:
+        previous_algo = previous_version.get('hash_algo', HASH_ALGO_SHA256)
+        if previous_algo == current_data['hash_algo']:
+            comparable_hash = current_data['content_hash']
+        else:
+            comparable_hash = compute_content_hash(current_data['raw_text'].encode(), previous_algo)
     
-    # Step 3: Compare
     if previous_version is None:
         # First run - no previous version
         print("\n[NEW] FIRST RUN - No previous version found")
@@ -221,7 +329,7 @@ def detect_changes_optimized(page_id):
         has_changes = True
         change_summary = "Initial extraction"
     
-    elif current_data['content_hash'] == previous_version['content_hash']:
+    elif comparable_hash == previous_version['content_hash']:
         # No changes - content identical
         print("\n[OK] NO CHANGES DETECTED")
         print(f"   Content hash matches: {current_data['content_hash'][:16]}...")
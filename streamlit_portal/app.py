@@ -7,7 +7,9 @@ import streamlit as st
 import os
 import requests
 from datetime import datetime
-from azure.cosmos import CosmosClient, PartitionKey
+from azure.cosmos import CosmosClient, PartitionKey, exceptions
+from azure.core.pipeline.transport import RequestsTransport
+from requests.adapters import HTTPAdapter
 
 # Page configuration
 st.set_page_config(
@@ -17,42 +19,17 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #00796b;
-        text-align: center;
-        margin-bottom: 1rem;
-    }
-    .sub-header {
-        font-size: 1.2rem;
-        color: #666;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .page-card {
-        background-color: #f1f8f6;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-left: 4px solid #00796b;
-    }
-    .success-box {
-        background-color: #d4edda;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .warning-box {
-        background-color: #fff3cd;
-        border-radius: 10px;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-</style>
-""", unsafe_allow_html=True)
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css")
+
+
+@st.cache_data
+def load_css() -> str:
+    """Read the portal stylesheet once and reuse it across reruns"""
+    with open(CSS_PATH, "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Available pages
 AVAILABLE_PAGES = {
@@ -82,11 +59,16 @@ AVAILABLE_PAGES = {
     }
 }
 
+# Lookups derived once from AVAILABLE_PAGES
+PAGE_ID_TO_NAME = {page_id: info["name"] for page_id, info in AVAILABLE_PAGES.items()}
+AVAILABLE_PAGE_IDS = frozenset(AVAILABLE_PAGES)
+
 # Cosmos DB Configuration (from Streamlit secrets)
 COSMOS_ENDPOINT = st.secrets.get("COSMOS_ENDPOINT", os.getenv("COSMOS_ENDPOINT", ""))
 COSMOS_KEY = st.secrets.get("COSMOS_KEY", os.getenv("COSMOS_KEY", ""))
 COSMOS_DATABASE = st.secrets.get("COSMOS_DATABASE", os.getenv("COSMOS_DATABASE", "confluence-digest"))
 COSMOS_CONTAINER = st.secrets.get("COSMOS_CONTAINER", os.getenv("COSMOS_CONTAINER", "subscriptions"))
+COSMOS_POOL_SIZE = 20
 
 # DEBUG: Show what's being read (always visible for now)
 st.sidebar.markdown("### 🔧 Debug Info")
@@ -150,7 +132,16 @@ def get_cosmos_client():
     if not COSMOS_ENDPOINT or not COSMOS_KEY:
         return None
     try:
-        client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
+        # Pooled keep-alive session, reused across reruns via cache_resource
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=COSMOS_POOL_SIZE, pool_maxsize=COSMOS_POOL_SIZE)
+        session.mount("https://", adapter)
+        client = CosmosClient(
+            COSMOS_ENDPOINT,
+            COSMOS_KEY,
+            transport=RequestsTransport(session=session, session_owner=False),
+            retry_total=9
+        )
         database = client.create_database_if_not_exists(id=COSMOS_DATABASE)
         container = database.create_container_if_not_exists(
             id=COSMOS_CONTAINER,
@@ -163,6 +154,15 @@ def get_cosmos_client():
         return None
 
 
+# Resolved once per script run; demo mode skips every Cosmos-dependent path
+COSMOS_OK = get_cosmos_client() is not None
+
+
+def get_subscription_id(email: str) -> str:
+    """Build the deterministic subscription document id for an email"""
+    return email.lower().replace("@", "_at_").replace(".", "_")
+
+
 def get_subscription(email: str) -> dict:
     """Get a user's subscription record"""
     container = get_cosmos_client()
@@ -173,7 +173,7 @@ def get_subscription(email: str) -> dict:
         items = list(container.query_items(
             query=query,
             parameters=[{"name": "@email", "value": email.lower()}],
-            enable_cross_partition_query=True
+            partition_key="subscriptions"
         ))
         return items[0] if items else None
     except Exception as e:
@@ -189,7 +189,7 @@ def create_subscription(email: str, name: str, page_ids: list) -> bool:
     try:
         now = datetime.utcnow().isoformat()
         subscription = {
-            "id": email.lower().replace("@", "_at_").replace(".", "_"),
+            "id": get_subscription_id(email),
             "partitionKey": "subscriptions",
             "email": email.lower(),
             "displayName": name,
@@ -197,10 +197,10 @@ def create_subscription(email: str, name: str, page_ids: list) -> bool:
             "subscriptions": [
                 {
                     "pageId": page_id,
-                    "pageName": AVAILABLE_PAGES[page_id]["name"],
+                    "pageName": PAGE_ID_TO_NAME[page_id],
                     "subscribedAt": now
                 }
-                for page_id in page_ids if page_id in AVAILABLE_PAGES
+                for page_id in page_ids if page_id in AVAILABLE_PAGE_IDS
             ],
             "preferences": {
                 "frequency": "immediate",
@@ -216,54 +216,55 @@ def create_subscription(email: str, name: str, page_ids: list) -> bool:
         return False
 
 
-def update_subscription(email: str, page_ids: list) -> bool:
-    """Update subscription page list"""
+def update_subscription(existing: dict, page_ids: list) -> bool:
+    """Update the page list of an already-loaded subscription document"""
     container = get_cosmos_client()
-    if not container:
+    if not container or not existing:
         return False
     try:
-        existing = get_subscription(email)
-        if existing:
-            now = datetime.utcnow().isoformat()
-            
-            # Build subscriptions list preserving existing timestamps
-            current_subs = {s['pageId']: s for s in existing.get('subscriptions', [])}
-            
-            new_subscriptions = []
-            for page_id in page_ids:
-                if page_id in AVAILABLE_PAGES:
-                    if page_id in current_subs:
-                        # Keep existing subscription with original timestamp
-                        new_subscriptions.append(current_subs[page_id])
-                    else:
-                        # New subscription
-                        new_subscriptions.append({
-                            "pageId": page_id,
-                            "pageName": AVAILABLE_PAGES[page_id]["name"],
-                            "subscribedAt": now
-                        })
-            
-            existing['subscriptions'] = new_subscriptions
-            existing['updatedAt'] = now
-            container.upsert_item(existing)
-            return True
-        return False
+        now = datetime.utcnow().isoformat()
+        
+        # Build subscriptions list preserving existing timestamps
+        current_subs = {s['pageId']: s for s in existing.get('subscriptions', [])}
+        
+        new_subscriptions = []
+        for page_id in page_ids:
+            if page_id in AVAILABLE_PAGES:
+                if page_id in current_subs:
+                    # Keep existing subscription with original timestamp
+                    new_subscriptions.append(current_subs[page_id])
+                else:
+                    # New subscription
+                    new_subscriptions.append({
+                        "pageId": page_id,
+                        "pageName": AVAILABLE_PAGES[page_id]["name"],
+                        "subscribedAt": now
+                    })
+        
+        existing['subscriptions'] = new_subscriptions
+        existing['updatedAt'] = now
+        container.upsert_item(existing)
+        return True
     except Exception as e:
         st.error(f"Error updating subscription: {e}")
         return False
 
 
+def update_subscription_by_email(email: str, page_ids: list) -> bool:
+    """Update subscription page list, loading the document by email first"""
+    return update_subscription(get_subscription(email), page_ids)
+
+
 def unsubscribe_all(email: str) -> bool:
     """Unsubscribe user from all pages"""
     container = get_cosmos_client()
     if not container:
         return False
     try:
-        existing = get_subscription(email)
-        if existing:
-            # Delete the subscription document
-            container.delete_item(item=existing["id"], partition_key="subscriptions")
-            return True
+        # Document id is derived from the email, so delete directly
+        container.delete_item(item=get_subscription_id(email), partition_key="subscriptions")
+        return True
+    except exceptions.CosmosResourceNotFoundError:
         return False
     except Exception as e:
         st.error(f"Error unsubscribing: {e}")
@@ -276,9 +277,7 @@ def main():
     st.markdown('<p class="sub-header">Subscribe to receive email updates when Confluence pages change</p>', unsafe_allow_html=True)
     
     # Check Cosmos DB connection
-    container = get_cosmos_client()
-    
-    if not container:
+    if not COSMOS_OK:
         st.warning("""
         ⚠️ **Cosmos DB not configured**
         
@@ -313,40 +312,43 @@ def main():
     
     # Load existing subscription
     existing_sub = None
-    existing_pages = []
-    if email and container:
+    existing_pages = set()
+    if email and COSMOS_OK:
         existing_sub = get_subscription(email)
         if existing_sub:
             # Extract page IDs from the subscriptions array
-            existing_pages = [s['pageId'] for s in existing_sub.get('subscriptions', [])]
+            existing_pages = {s['pageId'] for s in existing_sub.get('subscriptions', [])}
             name = existing_sub.get('displayName', name)  # Pre-fill name from existing subscription
     
-    # Page selection
-    st.subheader("📄 Available Pages")
-    st.markdown("Select the pages you want to receive email updates for:")
-    
-    selected_pages = []
-    for page_id, page_info in AVAILABLE_PAGES.items():
-        is_checked = page_id in existing_pages
-        col1, col2 = st.columns([0.1, 0.9])
-        with col1:
-            checked = st.checkbox(
-                "Select",
-                value=is_checked,
-                key=f"page_{page_id}",
-                label_visibility="collapsed"
-            )
-        with col2:
-            st.markdown(f"""
-            <div class="page-card">
-                <strong>{page_info['icon']} {page_info['name']}</strong><br>
-                <small style="color: #666;">{page_info['description']}</small><br>
-                <small style="color: #999;">Page ID: {page_id} | Space: {page_info['space']}</small>
-            </div>
-            """, unsafe_allow_html=True)
+    # Page selection - grouped in a form so checkbox clicks don't rerun the script
+    with st.form("subs_form"):
+        st.subheader("📄 Available Pages")
+        st.markdown("Select the pages you want to receive email updates for:")
+        
+        selected_pages = []
+        for page_id, page_info in AVAILABLE_PAGES.items():
+            is_checked = page_id in existing_pages
+            col1, col2 = st.columns([0.1, 0.9])
+            with col1:
+                checked = st.checkbox(
+                    "Select",
+                    value=is_checked,
+                    key=f"page_{page_id}",
+                    label_visibility="collapsed"
+                )
+            with col2:
+                st.markdown(f"""
+                <div class="page-card">
+                    <strong>{page_info['icon']} {page_info['name']}</strong><br>
+                    <small style="color: #666;">{page_info['description']}</small><br>
+                    <small style="color: #999;">Page ID: {page_id} | Space: {page_info['space']}</small>
+                </div>
+                """, unsafe_allow_html=True)
+            
+            if checked:
+                selected_pages.append(page_id)
         
-        if checked:
-            selected_pages.append(page_id)
+        save_btn = st.form_submit_button("💾 Save Preferences", type="primary", use_container_width=True)
     
     st.divider()
     
@@ -362,23 +364,17 @@ def main():
     
     st.divider()
     
-    # Action Buttons
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    with col1:
-        save_btn = st.button("💾 Save Preferences", type="primary", use_container_width=True)
-    
-    with col2:
-        if container:
+    # Action Buttons (demo mode only offers a preview of what would be saved)
+    load_btn = False
+    unsub_btn = False
+    if COSMOS_OK:
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
             load_btn = st.button("📥 Load My Settings", use_container_width=True)
-        else:
-            load_btn = False
-    
-    with col3:
-        if container:
+        
+        with col2:
             unsub_btn = st.button("🚫 Unsubscribe All", use_container_width=True)
-        else:
-            unsub_btn = False
     
     # Handle Save
     if save_btn:
@@ -391,10 +387,10 @@ def main():
         elif "@" not in email:
             st.error("❌ Please enter a valid email address")
         else:
-            if container:
+            if COSMOS_OK:
                 try:
                     if existing_sub:
-                        success = update_subscription(email, selected_pages)
+                        success = update_subscription(existing_sub, selected_pages)
                         if success:
                             st.success(f"""
                             ✅ **Subscription updated successfully!**
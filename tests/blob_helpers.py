@@ -0,0 +1,38 @@
+"""Shared blob download helpers for the test/debug scripts"""
+import json
+
+# orjson parses the blob bytes directly and much faster; stdlib json is the fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Optional byte-level download progress
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+
+def byte_progress(total, desc):
+    """Byte-level progress bar when tqdm is installed, else None"""
+    if tqdm is None:
+        return None
+    return tqdm(total=total, unit='B', unit_scale=True, desc=desc, leave=False)
+
+
+def download_blob_bytes(blob_client):
+    """Stream a blob into one preallocated bytearray (no extra full-size copy)"""
+    downloader = blob_client.download_blob()
+    buf = bytearray(downloader.size)
+    offset = 0
+    progress = byte_progress(downloader.size, blob_client.blob_name)
+    for chunk in downloader.chunks():
+        buf[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+        if progress:
+            progress.update(len(chunk))
+    if progress:
+        progress.close()
+    return buf
@@ -1,12 +1,13 @@
 """Quick test to check blob content for images"""
-import json
 import sys
 import os
 
 from azure.storage.blob import BlobServiceClient
+from dotenv import load_dotenv
+
+from blob_helpers import download_blob_bytes, json_loads
 
 # Load env from current directory
-from dotenv import load_dotenv
 load_dotenv()
 
 STORAGE_CONNECTION_STRING = os.environ.get('BLOB_STORAGE_CONNECTION_STRING')
@@ -23,43 +24,63 @@ if not STORAGE_CONNECTION_STRING:
 blob_service = BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING, connection_verify=False)
 container = blob_service.get_container_client('confluence-rag')
 
-# Check all pages
-prefix = 'CIPPMOPF/'
+# Block details need the full document body; the summary comes from blob metadata
+VERBOSE = "--verbose" in sys.argv
+
+# Space keys to check (one blob "directory" per space), e.g. check_blob_images.py CIPPMOPF OTHER
+space_keys = [arg for arg in sys.argv[1:] if not arg.startswith('--')] or ['CIPPMOPF']
+prefixes = [f"{space_key}/" for space_key in space_keys]
 found_any = False
 
+
+# The RAG layout is flat ({space_key}/{title}_{page_id}_v{n}.json), so one listing
+# per space returns every blob along with its metadata
+blobs = [
+    blob
+    for prefix in prefixes
+    for blob in container.list_blobs(name_starts_with=prefix, include=['metadata'], results_per_page=5000)
+]
+
 # Check all blobs for any page
-for blob in container.list_blobs(name_starts_with=prefix):
-    # Get page ID from blob name - look at last version of each page
+for blob in blobs:
     print(f"Checking: {blob.name}")
-        found_any = True
-        print(f"Found blob: {blob.name}")
-        
-        blob_client = container.get_blob_client(blob.name)
-        content = json.loads(blob_client.download_blob().readall())
-        
-        print(f"  Version: {content['metadata']['version']}")
-        print(f"  Total blocks: {len(content['content_blocks'])}")
-        print(f"  Images described: {content['metadata'].get('images_described', False)}")
-        print(f"  Total images: {content['metadata'].get('total_images', 0)}")
-        
-        print("\n  Blocks breakdown:")
-        for i, block in enumerate(content['content_blocks']):
-            block_type = block['type']
-            if block_type == 'image':
-                print(f"    [{i}] IMAGE: {block.get('filename', 'unknown')}")
-                print(f"         Has description: {bool(block.get('description'))}")
-                if block.get('description'):
-                    print(f"         Desc type: {block.get('description_type', 'unknown')}")
-                    print(f"         Desc preview: {block['description'][:100]}...")
-            elif block_type == 'text':
-                preview = block.get('content', '')[:60].replace('\n', ' ')
-                print(f"    [{i}] TEXT: {preview}...")
-            elif block_type == 'heading':
-                print(f"    [{i}] HEADING: {block.get('content', '')[:60]}")
-            elif block_type == 'list':
-                print(f"    [{i}] LIST: {len(block.get('items', []))} items")
-            else:
-                print(f"    [{i}] {block_type.upper()}")
+    found_any = True
+    print(f"Found blob: {blob.name}")
+    
+    md = blob.metadata or {}
+    if 'version' in md:
+        print(f"  Version: {md['version']}")
+        print(f"  Total blocks: {md.get('n_blocks', 'N/A')}")
+        print(f"  Images described: {md.get('images_described') == '1'}")
+        print(f"  Total images: {md.get('total_images', 0)}")
+        print(f"  Block types: {md.get('block_types', 'N/A')}")
+    else:
+        print("  No summary metadata (uploaded before metadata was added) - use --verbose")
+    
+    if not VERBOSE:
+        continue
+    
+    blob_client = container.get_blob_client(blob)
+    content = json_loads(download_blob_bytes(blob_client))
+    
+    print("\n  Blocks breakdown:")
+    for i, block in enumerate(content['content_blocks']):
+        block_type = block['type']
+        if block_type == 'image':
+            print(f"    [{i}] IMAGE: {block.get('filename', 'unknown')}")
+            print(f"         Has description: {bool(block.get('description'))}")
+            if block.get('description'):
+                print(f"         Desc type: {block.get('description_type', 'unknown')}")
+                print(f"         Desc preview: {block['description'][:100]}...")
+        elif block_type == 'text':
+            preview = block.get('content', '')[:60].replace('\n', ' ')
+            print(f"    [{i}] TEXT: {preview}...")
+        elif block_type == 'heading':
+            print(f"    [{i}] HEADING: {block.get('content', '')[:60]}")
+        elif block_type == 'list':
+            print(f"    [{i}] LIST: {len(block.get('items', []))} items")
+        else:
+            print(f"    [{i}] {block_type.upper()}")
 
 if not found_any:
-    print("No blobs found matching pattern for page 17386855")
+    print(f"No blobs found under prefix(es): {', '.join(prefixes)}")
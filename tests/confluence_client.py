@@ -0,0 +1,17 @@
+"""Shared Confluence HTTP client for the exploration scripts"""
+import httpx
+
+
+def create_confluence_client(email, api_token):
+    """HTTP/2 client for a script's worker threads to share (requests multiplex over one TLS connection)"""
+    return httpx.Client(
+        auth=(email or "", api_token),
+        headers={"Accept": "application/json"},
+        timeout=30.0,
+        transport=httpx.HTTPTransport(
+            http2=True,
+            verify=False,  # Corporate network with self-signed certs
+            retries=3,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+        )
+    )
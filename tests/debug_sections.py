@@ -1,10 +1,12 @@
 """Debug the sectioning logic"""
-import json
 import sys
 import os
 
 from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
+
+from blob_helpers import download_blob_bytes, json_loads
+
 load_dotenv()
 
 STORAGE_CONNECTION_STRING = os.environ.get('BLOB_STORAGE_CONNECTION_STRING')
@@ -13,7 +15,7 @@ container = blob_service.get_container_client('confluence-rag')
 
 # Get v9 of RACI
 blob_client = container.get_blob_client('CIPPMOPF/RACI_17386855_v9.json')
-content = json.loads(blob_client.download_blob().readall())
+content = json_loads(download_blob_bytes(blob_client))
 content_blocks = content['content_blocks']
 
 def is_heading_like(block):
@@ -21,9 +23,9 @@ def is_heading_like(block):
         return True
     if block['type'] == 'text':
         content = block.get('content', '')
-        word_count = len(content.split())
-        char_count = len(content)
-        if char_count < 100 or word_count < 20:
+        if len(content) < 100:
+            return True
+        if len(content.split()) < 20:
             return True
     return False
 
@@ -5,12 +5,15 @@ Step 1: Find the 'ARCHIVED - To be deleted' page and its sub-pages
 
 import os
 import json
+import re
 import sys
-import requests
-from requests.auth import HTTPBasicAuth
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import urllib3
 
+from confluence_client import create_confluence_client
+
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -25,28 +28,25 @@ if not all([confluence_url, api_token]):
     print("Missing required environment variables")
     sys.exit(1)
 
-headers = {"Accept": "application/json"}
-auth = HTTPBasicAuth(email, api_token) if email else HTTPBasicAuth("", api_token)
+client = create_confluence_client(email, api_token)
 
+# Image reference patterns, compiled once
+_RE_AC_IMAGE = re.compile(r'<ac:image[^>]*>.*?</ac:image>', re.DOTALL)
+_RE_IMG_TAG = re.compile(r'<img[^>]+>')
+_RE_RI_ATTACHMENT = re.compile(r'<ri:attachment ri:filename="([^"]+)"')
 
-def search_pages(query, limit=25):
-    """Search for pages using CQL"""
+
+def cql_search(cql, limit=25, expand="space,ancestors"):
+    """Run a raw CQL query against the content search endpoint"""
     url = f"{confluence_url}/rest/api/content/search"
-    params = {
-        "cql": f'text ~ "{query}" OR title ~ "{query}"',
-        "limit": limit,
-        "expand": "space,ancestors"
-    }
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    return response.json() if response.ok else None
+    params = {"cql": cql, "limit": limit, "expand": expand}
+    response = client.get(url, params=params)
+    return response.json() if response.is_success else None
 
 
-def get_page_children(page_id, limit=100):
-    """Get child pages of a given page"""
-    url = f"{confluence_url}/rest/api/content/{page_id}/child/page"
-    params = {"limit": limit, "expand": "version,space"}
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    return response.json() if response.ok else None
+def search_pages(query, limit=25):
+    """Search for pages using CQL"""
+    return cql_search(f'text ~ "{query}" OR title ~ "{query}"', limit=limit)
 
 
 def get_page_by_title(space_key, title):
@@ -57,34 +57,43 @@ def get_page_by_title(space_key, title):
         "title": title,
         "expand": "body.storage,version,space,ancestors,children.page"
     }
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    return response.json() if response.ok else None
+    response = client.get(url, params=params)
+    return response.json() if response.is_success else None
+
+
+def fetch_remaining_results(collection, base_url, expand=None):
+    """Follow an expanded collection's _links.next so it isn't cut off at the expansion's default limit (25)"""
+    next_link = collection.get('_links', {}).get('next')
+    params = {"expand": expand} if expand else None
+    while next_link:
+        response = client.get(f"{base_url}{next_link}", params=params)
+        if not response.is_success:
+            print(f"⚠️ Could not fetch more results ({next_link}): HTTP {response.status_code}")
+            break
+        data = response.json()
+        collection.setdefault('results', []).extend(data.get('results', []))
+        next_link = data.get('_links', {}).get('next')
 
 
 def get_page_with_attachments(page_id):
-    """Get page content including attachments"""
+    """Get page content, attachments (with media type) and child pages, following the expansions past their first page"""
     url = f"{confluence_url}/rest/api/content/{page_id}"
     params = {
-        "expand": "body.storage,version,space,ancestors,children.page,children.attachment"
+        "expand": "body.storage,version,space,ancestors,children.page,children.attachment,children.attachment.metadata"
     }
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    return response.json() if response.ok else None
-
-
-def get_page_attachments(page_id):
-    """Get all attachments for a page"""
-    url = f"{confluence_url}/rest/api/content/{page_id}/child/attachment"
-    params = {"expand": "version,metadata"}
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    return response.json() if response.ok else None
+    response = client.get(url, params=params)
+    if not response.is_success:
+        return None
+    page = response.json()
+    base_url = page.get('_links', {}).get('base', confluence_url)
+    children = page.get('children', {})
+    fetch_remaining_results(children.get('page', {}), base_url)
+    fetch_remaining_results(children.get('attachment', {}), base_url, expand="metadata")
+    return page
 
 
-def print_page_tree(page_id, indent=0):
-    """Recursively print page tree"""
-    page = get_page_with_attachments(page_id)
-    if not page:
-        return
-    
+def print_page_summary(page, indent):
+    """Print one page with its attachments and sub-page count"""
     prefix = "  " * indent
     print(f"{prefix}📄 {page.get('title', 'N/A')}")
     print(f"{prefix}   ID: {page.get('id')}")
@@ -100,12 +109,37 @@ def print_page_tree(page_id, indent=0):
             media_type = att.get('metadata', {}).get('mediaType', 'unknown')
             print(f"{prefix}      - {att_title} ({media_type})")
     
-    # Get children
     children = page.get('children', {}).get('page', {}).get('results', [])
     if children:
         print(f"{prefix}   📁 Sub-pages: {len(children)}")
-        for child in children:
-            print_page_tree(child.get('id'), indent + 2)
+
+
+def print_page_tree(page_id, indent=0, max_workers=16):
+    """
+    Print page tree. Pages are fetched breadth-first, one level at a time
+    in parallel, then printed depth-first without recursion.
+    """
+    pages = {}
+    queue = deque([page_id])
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while queue:
+            level = [queue.popleft() for _ in range(len(queue))]
+            for pid, page in zip(level, executor.map(get_page_with_attachments, level)):
+                pages[pid] = page
+                if page:
+                    for child in page.get('children', {}).get('page', {}).get('results', []):
+                        queue.append(child.get('id'))
+    
+    stack = [(page_id, indent)]
+    while stack:
+        pid, depth = stack.pop()
+        page = pages.get(pid)
+        if not page:
+            continue
+        print_page_summary(page, depth)
+        children = page.get('children', {}).get('page', {}).get('results', [])
+        stack.extend((child.get('id'), depth + 2) for child in reversed(children))
 
 
 # ============================================================
@@ -115,12 +149,12 @@ print("=" * 70)
 print("STEP 1: Searching for 'ARCHIVED - To be deleted' page")
 print("=" * 70)
 
-search_result = search_pages("ARCHIVED - To be deleted")
+archived_page_id = None
+search_result = cql_search('title = "ARCHIVED - To be deleted"')
 if search_result:
     results = search_result.get("results", [])
     print(f"Found {len(results)} matching pages:\n")
     
-    archived_page_id = None
     for page in results:
         title = page.get("title", "N/A")
         page_id = page.get("id", "N/A")
@@ -149,12 +183,20 @@ print("\n" + "=" * 70)
 print("STEP 2: Searching for 'ProPM Roles & Responsibilities'")
 print("=" * 70)
 
-search_result = search_pages("ProPM Roles")
+# With the ARCHIVED page known, let Confluence do the ancestor filtering
+target_page_id = None
+if archived_page_id:
+    search_result = cql_search(
+        f'ancestor = {archived_page_id} AND title ~ "ProPM Roles"',
+        expand="ancestors,version,space"
+    )
+else:
+    search_result = search_pages("ProPM Roles")
+
 if search_result:
     results = search_result.get("results", [])
     print(f"Found {len(results)} matching pages:\n")
     
-    target_page_id = None
     for page in results:
         title = page.get("title", "N/A")
         page_id = page.get("id", "N/A")
@@ -168,11 +210,10 @@ if search_result:
             ancestor_path = " → ".join([a.get("title", "?") for a in ancestors])
             print(f"     Path: {ancestor_path} → {title}")
         
-        # Check if this is under ARCHIVED
-        for ancestor in ancestors:
-            if "ARCHIVED" in ancestor.get("title", ""):
-                target_page_id = page_id
-                print(f"     ✅ This is under ARCHIVED!")
+        # Check if this is under ARCHIVED (already guaranteed by the ancestor filter)
+        if archived_page_id or any("ARCHIVED" in ancestor.get("title", "") for ancestor in ancestors):
+            target_page_id = page_id
+            print(f"     ✅ This is under ARCHIVED!")
         print()
 else:
     print("❌ Search failed")
@@ -204,17 +245,15 @@ if target_page_id:
         print("\n" + "-" * 50)
         print("📎 ATTACHMENTS:")
         print("-" * 50)
-        attachments_data = get_page_attachments(target_page_id)
-        if attachments_data:
-            attachments = attachments_data.get("results", [])
-            if attachments:
-                for att in attachments:
-                    print(f"  • {att.get('title')}")
-                    print(f"    Type: {att.get('metadata', {}).get('mediaType', 'unknown')}")
-                    print(f"    Size: {att.get('extensions', {}).get('fileSize', 'N/A')} bytes")
-                    print(f"    Download: {confluence_url}{att.get('_links', {}).get('download', '')}")
-            else:
-                print("  No attachments found")
+        attachments = page_data.get('children', {}).get('attachment', {}).get('results', [])
+        if attachments:
+            for att in attachments:
+                print(f"  • {att.get('title')}")
+                print(f"    Type: {att.get('metadata', {}).get('mediaType', 'unknown')}")
+                print(f"    Size: {att.get('extensions', {}).get('fileSize', 'N/A')} bytes")
+                print(f"    Download: {confluence_url}{att.get('_links', {}).get('download', '')}")
+        else:
+            print("  No attachments found")
         
         # Content preview
         print("\n" + "-" * 50)
@@ -230,13 +269,12 @@ if target_page_id:
         print("\n" + "-" * 50)
         print("🖼️ IMAGES REFERENCED IN CONTENT:")
         print("-" * 50)
-        import re
         # Find ac:image tags (Confluence macro)
-        ac_images = re.findall(r'<ac:image[^>]*>.*?</ac:image>', content, re.DOTALL)
+        ac_images = _RE_AC_IMAGE.findall(content)
         # Find regular img tags
-        img_tags = re.findall(r'<img[^>]+>', content)
+        img_tags = _RE_IMG_TAG.findall(content)
         # Find ri:attachment references
-        ri_attachments = re.findall(r'<ri:attachment ri:filename="([^"]+)"', content)
+        ri_attachments = _RE_RI_ATTACHMENT.findall(content)
         
         if ac_images:
             print(f"  Found {len(ac_images)} Confluence image macros")
@@ -258,30 +296,51 @@ if target_page_id:
         print("\n" + "-" * 50)
         print("📁 CHILD PAGES:")
         print("-" * 50)
-        children_result = get_page_children(target_page_id)
-        if children_result:
-            children = children_result.get("results", [])
-            if children:
-                for child in children:
-                    print(f"  • {child.get('title')} (ID: {child.get('id')})")
-            else:
-                print("  No child pages")
+        children = page_data.get('children', {}).get('page', {}).get('results', [])
+        if children:
+            for child in children:
+                print(f"  • {child.get('title')} (ID: {child.get('id')})")
+        else:
+            print("  No child pages")
 else:
     print("\n⚠️ Target page not found. Let's try listing all pages in CIPPMOPF space...")
     
-    # List pages in CIPPMOPF that might contain ARCHIVED
-    url = f"{confluence_url}/rest/api/content/search"
-    params = {
-        "cql": 'space = "CIPPMOPF" AND title ~ "ARCHIVED"',
-        "limit": 50,
-        "expand": "ancestors"
-    }
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
-    if response.ok:
+    # List pages in CIPPMOPF that might contain ARCHIVED. The cursor-paginated
+    # scan endpoint (Confluence 7.18+) is much faster for bulk listing; older
+    # servers return 404 there, so fall back to the CQL search.
+    url = f"{confluence_url}/rest/api/content/scan"
+    params = {"spaceKey": "CIPPMOPF", "type": "page", "limit": 250, "expand": "ancestors"}
+    response = client.get(url, params=params)
+    if response.status_code == 404:
+        response = client.get(
+            f"{confluence_url}/rest/api/content/search",
+            params={
+                "cql": 'space = "CIPPMOPF" AND title ~ "ARCHIVED"',
+                "limit": 50,
+                "expand": "ancestors"
+            }
+        )
+        if not response.is_success:
+            print(f"❌ Search failed: HTTP {response.status_code}")
+            sys.exit(1)
         results = response.json().get("results", [])
-        print(f"\nFound {len(results)} ARCHIVED-related pages in CIPPMOPF:")
-        for page in results:
-            print(f"  📄 {page.get('title')} (ID: {page.get('id')})")
+    else:
+        results = []
+        while True:
+            # Any error here (including partway through paging) would silently truncate the listing
+            if not response.is_success:
+                print(f"❌ Page listing failed: HTTP {response.status_code}")
+                sys.exit(1)
+            data = response.json()
+            results.extend(page for page in data.get("results", []) if "archived" in page.get("title", "").casefold())
+            next_link = data.get("_links", {}).get("next")
+            if not next_link:
+                break
+            response = client.get(f"{data['_links'].get('base', confluence_url)}{next_link}")
+    
+    print(f"\nFound {len(results)} ARCHIVED-related pages in CIPPMOPF:")
+    for page in results:
+        print(f"  📄 {page.get('title')} (ID: {page.get('id')})")
 
 print("\n" + "=" * 70)
 print("✅ Exploration complete!")
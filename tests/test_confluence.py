@@ -1,7 +1,10 @@
 import os
 import json
+import re
 import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
 import urllib3
@@ -12,6 +15,9 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # Load environment variables from .env file
 load_dotenv()
 
+# Strips HTML tags for the content preview
+_RE_HTML_TAG = re.compile('<.*?>')
+
 confluence_url = os.getenv("CONFLUENCE_URL")
 api_token = os.getenv("CONFLUENCE_API_TOKEN")
 email = os.getenv("CONFLUENCE_EMAIL")
@@ -20,6 +26,13 @@ if not all([confluence_url, api_token]):
     print("Missing required environment variables (CONFLUENCE_URL, CONFLUENCE_API_TOKEN)")
     sys.exit(1)
 
+# One session for all tests so the TCP/TLS connection is reused
+session = requests.Session()
+session.auth = HTTPBasicAuth(email, api_token) if email else HTTPBasicAuth("", api_token)
+session.headers.update({"Accept": "application/json"})
+session.verify = False
+session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
 # Test 1: List all Confluence spaces
 print("=" * 70)
 print("TEST 1: List all Confluence spaces")
@@ -27,10 +40,7 @@ print("=" * 70)
 
 try:
     url = f"{confluence_url}/rest/api/space"
-    headers = {"Accept": "application/json"}
-    auth = HTTPBasicAuth(email, api_token) if email else HTTPBasicAuth("", api_token)
-    
-    response = requests.get(url, headers=headers, auth=auth, timeout=30, verify=False)
+    response = session.get(url, timeout=30)
     
     if response.ok:
         data = response.json()
@@ -57,16 +67,27 @@ except requests.exceptions.RequestException as e:
     print(f"❌ Network error: {e}")
     sys.exit(1)
 
+# Tests 2 and 3 are independent reads - start both requests now so they overlap
+space_key = "CIPPMOPF"
+page_id = "304254123"
+executor = ThreadPoolExecutor(max_workers=2)
+space_pages_future = executor.submit(
+    session.get, f"{confluence_url}/rest/api/space/{space_key}/content/page",
+    params={"limit": 250, "expand": "ancestors,version"}, timeout=30
+)
+page_future = executor.submit(
+    session.get, f"{confluence_url}/rest/api/content/{page_id}",
+    params={"expand": "body.storage,version,space"}, timeout=30
+)
+executor.shutdown(wait=False)
+
 # Test 2: Get pages from a specific space (CIPPMOPF)
 print("\n" + "=" * 70)
 print("TEST 2: Get pages from CIPPMOPF space")
 print("=" * 70)
 
 try:
-    space_key = "CIPPMOPF"
-    url = f"{confluence_url}/rest/api/space/{space_key}/content/page"
-    
-    response = requests.get(url, headers=headers, auth=auth, timeout=30, verify=False)
+    response = space_pages_future.result()
     
     if response.ok:
         data = response.json()
@@ -94,11 +115,7 @@ print("TEST 3: Get specific page (JIRA - EASE Requirements)")
 print("=" * 70)
 
 try:
-    page_id = "304254123"
-    url = f"{confluence_url}/rest/api/content/{page_id}"
-    params = {"expand": "body.storage,version,space"}
-    
-    response = requests.get(url, headers=headers, auth=auth, params=params, timeout=30, verify=False)
+    response = page_future.result()
     
     if response.ok:
         page = response.json()
@@ -114,8 +131,7 @@ try:
         content = page.get("body", {}).get("storage", {}).get("value", "")
         if content:
             # Strip HTML tags for preview
-            import re
-            clean_content = re.sub('<.*?>', '', content)
+            clean_content = _RE_HTML_TAG.sub('', content)
             preview = clean_content[:500].strip()
             print(f"\n  📝 Content preview (first 500 chars):")
             print(f"  {preview}...")
@@ -0,0 +1,39 @@
+"""
+Test image reference extraction from Confluence storage-format HTML
+"""
+
+from explore_archived import extract_images_from_content
+
+
+def test_url_image_before_attachment_image():
+    """A URL image followed by an attachment image yields both, not just the attachment"""
+    html = (
+        '<p>Intro</p>'
+        '<ac:image ac:width="400"><ri:url ri:value="https://example.com/a.png" /></ac:image>'
+        '<p>Between</p>'
+        '<ac:image ac:height="250"><ri:attachment ri:filename="b.png" /></ac:image>'
+    )
+
+    assert extract_images_from_content(html) == [
+        {"type": "attachment", "filename": "b.png"},
+        {"type": "external_url", "url": "https://example.com/a.png"},
+    ]
+
+
+def test_img_tags_and_emoticons():
+    """Plain img tags and emoticons are picked up alongside ac:image references"""
+    html = (
+        '<IMG class="x" src="/download/c.png">'
+        '<ac:emoticon ac:name="tick" />'
+    )
+
+    assert extract_images_from_content(html) == [
+        {"type": "img_tag", "src": "/download/c.png"},
+        {"type": "emoticon", "name": "tick"},
+    ]
+
+
+if __name__ == "__main__":
+    test_url_image_before_attachment_image()
+    test_img_tags_and_emoticons()
+    print("✅ Image extraction tests passed")
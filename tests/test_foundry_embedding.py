@@ -1,10 +1,10 @@
 """
 Test Microsoft Foundry embedding API to find correct version
 """
+import asyncio
 import os
 import httpx
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 
 load_dotenv()
 
@@ -21,25 +21,48 @@ api_versions = [
 
 endpoint = os.getenv("FOUNDRY_EMBEDDING_ENDPOINT")
 api_key = os.getenv("FOUNDRY_EMBEDDING_API_KEY")
+EMBEDDING_MODEL = "text-embedding-3-small"
 
 print(f"Testing endpoint: {endpoint}\n")
 
-for version in api_versions:
-    try:
-        print(f"Testing API version: {version}... ", end="")
-        client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            api_key=api_key,
-            api_version=version,
-            http_client=httpx.Client(verify=False)
-        )
-        
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input="test"
-        )
-        
-        print(f"✅ SUCCESS! Embedding dimension: {len(response.data[0].embedding)}")
-        break
-    except Exception as e:
-        print(f"❌ Failed: {str(e)[:100]}")
+
+async def probe(client, version):
+    """POST a tiny embedding request for one API version; returns (version, response)"""
+    url = f"{endpoint.rstrip('/')}/openai/deployments/{EMBEDDING_MODEL}/embeddings"
+    response = await client.post(
+        url,
+        params={"api-version": version},
+        headers={"api-key": api_key},
+        json={"input": "test", "model": EMBEDDING_MODEL},
+    )
+    return version, response
+
+
+async def main():
+    # Fire all version probes at once and stop at the first 200 OK
+    async with httpx.AsyncClient(verify=False, timeout=30) as client:
+        tasks = [asyncio.create_task(probe(client, version)) for version in api_versions]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    version, response = await next_done
+                except Exception as e:
+                    print(f"❌ Failed: {str(e)[:100]}")
+                    continue
+
+                if response.status_code == 200:
+                    dimension = len(response.json()["data"][0]["embedding"])
+                    print(f"API version {version}: ✅ SUCCESS! Embedding dimension: {dimension}")
+                    return version
+                print(f"API version {version}: ❌ Failed: {response.status_code} {response.text[:100]}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    print("\n❌ No API version succeeded")
+    return None
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
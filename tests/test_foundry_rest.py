@@ -3,6 +3,7 @@ Test Microsoft Foundry embedding API using direct REST calls
 """
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,20 +20,28 @@ test_urls = [
     endpoint.replace("/api/projects/", "/openai/deployments/") + "/embeddings",
 ]
 
-for url in test_urls:
+headers = {
+    "Content-Type": "application/json",
+    "api-key": api_key
+}
+
+payload = {
+    "input": "test embedding",
+    "model": "text-embedding-3-small"
+}
+
+# Probe all URL variants at once and stop at the first 200
+executor = ThreadPoolExecutor(max_workers=len(test_urls))
+futures = {
+    executor.submit(requests.post, url, json=payload, headers=headers, verify=False, timeout=10): url
+    for url in test_urls
+}
+
+for future in as_completed(futures):
+    url = futures[future]
     print(f"\nTesting URL: {url}")
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": api_key
-    }
-    
-    payload = {
-        "input": "test embedding",
-        "model": "text-embedding-3-small"
-    }
-    
     try:
-        response = requests.post(url, json=payload, headers=headers, verify=False)
+        response = future.result()
         print(f"Status: {response.status_code}")
         if response.status_code == 200:
             print(f"✅ SUCCESS!")
@@ -44,3 +53,5 @@ for url in test_urls:
             print(f"Response: {response.text[:200]}")
     except Exception as e:
         print(f"Error: {e}")
+
+executor.shutdown(wait=False, cancel_futures=True)
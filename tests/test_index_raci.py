@@ -1,8 +1,8 @@
 """Test indexing for RACI page specifically"""
-import json
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from azure.storage.blob import BlobServiceClient
 from azure.core.credentials import AzureKeyCredential
@@ -14,6 +14,9 @@ from azure.search.documents.indexes.models import (
 )
 from openai import AzureOpenAI
 from dotenv import load_dotenv
+
+from blob_helpers import download_blob_bytes, json_loads
+
 load_dotenv()
 
 # Config
@@ -25,6 +28,9 @@ EMBEDDING_ENDPOINT = os.environ.get('FOUNDRY_EMBEDDING_ENDPOINT')
 EMBEDDING_API_KEY = os.environ.get('FOUNDRY_EMBEDDING_API_KEY')
 EMBEDDING_MODEL = os.environ.get('FOUNDRY_EMBEDDING_DEPLOYMENT', 'text-embedding-3-small')
 
+# Per-image/per-chunk debug output: pass --verbose or set VERBOSE=1
+VERBOSE = "--verbose" in sys.argv or os.getenv("VERBOSE") == "1"
+
 # Clients
 openai_client = AzureOpenAI(
     azure_endpoint=EMBEDDING_ENDPOINT,
@@ -32,28 +38,70 @@ openai_client = AzureOpenAI(
     api_version="2024-02-15-preview"
 )
 
-def generate_embedding(text):
-    response = openai_client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text[:8000]
-    )
-    return response.data[0].embedding
-
-def is_heading_like(block):
-    if block['type'] == 'heading':
-        return True
-    if block['type'] == 'text':
-        content = block.get('content', '')
-        if len(content) < 100 or len(content.split()) < 20:
-            return True
-    return False
+EMBEDDING_BATCH_SIZE = 16
+EMBEDDING_WORKERS = 4
+
+def generate_embeddings(texts, retry_count=3, retry_delay=2):
+    """Embed one batch of (already truncated) texts in a single call; only backs off when rate-limited (429)"""
+    for attempt in range(retry_count):
+        try:
+            response = openai_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts
+            )
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        except Exception as e:
+            error_msg = str(e)
+            if ("429" in error_msg or "rate limit" in error_msg.lower()) and attempt < retry_count - 1:
+                wait_time = retry_delay * (attempt + 1)
+                print(f"   ⏳ Rate limit hit, waiting {wait_time}s before retry...")
+                time.sleep(wait_time)
+                continue
+            raise
+
+# Section rendering: one handler per block type, dispatched through BLOCK_RENDERERS.
+# Each handler appends to the section's `rendered` accumulator.
+def render_text_block(block, section, rendered):
+    if block.get('content', '') != section['heading']:
+        rendered['content_parts'].append(block['content'])
+
+def render_list_block(block, section, rendered):
+    rendered['content_parts'].append('\n'.join([f"* {item}" for item in block.get('items', [])]))
+
+def render_image_block(block, section, rendered):
+    rendered['has_image'] = True
+    img_url = block.get('blob_url', '') or block.get('external_url', '')
+    if img_url:
+        rendered['image_urls'].append(img_url)
+    desc = block.get('description', '')
+    filename = block.get('filename', 'image')
+    desc_type = block.get('description_type', 'general')
+    
+    if VERBOSE:
+        print(f"      FOUND IMAGE: {filename}")
+        print(f"         Has description: {bool(desc)}")
+        print(f"         Desc type: {desc_type}")
+    
+    if desc:
+        rendered['image_descriptions'].append(f"[{desc_type.upper()}] {filename}: {desc}")
+        rendered['content_parts'].append(f"\nIMAGE ({desc_type}): {filename}\n{desc}\n")
+
+def render_other_block(block, section, rendered):
+    rendered['content_parts'].append(str(block.get('content', '')))
+
+BLOCK_RENDERERS = {
+    'heading': lambda block, section, rendered: None,  # Already emitted as the section heading
+    'text': render_text_block,
+    'list': render_list_block,
+    'image': render_image_block,
+}
 
 # Get document from blob
 print("1. Loading document from blob...")
 blob_service = BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING, connection_verify=False)
 container = blob_service.get_container_client('confluence-rag')
 blob_client = container.get_blob_client('CIPPMOPF/RACI_17386855_v9.json')
-document = json.loads(blob_client.download_blob().readall())
+document = json_loads(download_blob_bytes(blob_client))
 
 metadata = document['metadata']
 content_blocks = document['content_blocks']
@@ -67,12 +115,20 @@ sections = []
 current_section = {'heading': None, 'blocks': [], 'start_index': 0}
 
 for block in content_blocks:
-    if is_heading_like(block):
+    # Heading-like: a real heading, or short text (< 100 chars or < 20 words)
+    block_type = block['type']
+    if block_type == 'text':
+        content = block.get('content', '')
+        is_heading = len(content) < 100 or len(content.split()) < 20
+    else:
+        is_heading = block_type == 'heading'
+    
+    if is_heading:
         if current_section['blocks'] or current_section['heading']:
             sections.append(current_section)
         current_section = {
-            'heading': block.get('content', '') if block['type'] in ['heading', 'text'] else None,
-            'heading_level': block.get('level', 2) if block['type'] == 'heading' else 3,
+            'heading': block.get('content', '') if block_type in ('heading', 'text') else None,
+            'heading_level': block.get('level', 2) if block_type == 'heading' else 3,
             'blocks': [block],
             'start_index': block['index']
         }
@@ -87,66 +143,44 @@ print(f"   Created {len(sections)} sections")
 # Create chunks
 print("\n3. Creating chunks with embeddings...")
 chunks = []
+texts = []
+# Each full batch is embedded in the background while later sections are built
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS)
+embedding_futures = []
 
 for section_idx, section in enumerate(sections):
     chunk_id = f"{metadata['page_id']}_v{metadata['version']}_section_{section_idx:03d}"
     
-    content_parts = []
-    has_image = False
-    image_urls = []
-    image_descriptions = []
+    rendered = {'content_parts': [], 'has_image': False, 'image_urls': [], 'image_descriptions': []}
+    content_parts = rendered['content_parts']
+    image_urls = rendered['image_urls']
+    image_descriptions = rendered['image_descriptions']
     
     if section['heading']:
         heading_prefix = '#' * section.get('heading_level', 2)
         content_parts.append(f"{heading_prefix} {section['heading']}")
     
     for block in section['blocks']:
-        if block['type'] == 'heading':
-            continue
-        elif block['type'] == 'text':
-            if block.get('content', '') == section['heading']:
-                continue
-            content_parts.append(block['content'])
-        elif block['type'] == 'list':
-            items = '\n'.join([f"* {item}" for item in block.get('items', [])])
-            content_parts.append(items)
-        elif block['type'] == 'image':
-            has_image = True
-            img_url = block.get('blob_url', '') or block.get('external_url', '')
-            if img_url:
-                image_urls.append(img_url)
-            desc = block.get('description', '')
-            filename = block.get('filename', 'image')
-            desc_type = block.get('description_type', 'general')
-            
-            print(f"      FOUND IMAGE: {filename}")
-            print(f"         Has description: {bool(desc)}")
-            print(f"         Desc type: {desc_type}")
-            
-            if desc:
-                image_descriptions.append(f"[{desc_type.upper()}] {filename}: {desc}")
-                content_parts.append(f"\nIMAGE ({desc_type}): {filename}\n{desc}\n")
-        else:
-            content_parts.append(str(block.get('content', '')))
+        BLOCK_RENDERERS.get(block['type'], render_other_block)(block, section, rendered)
     
+    has_image = rendered['has_image']
     content_text = '\n\n'.join(content_parts)
     
     if not content_text.strip():
         continue
     
-    print(f"\n   Section {section_idx}: {section['heading'][:50] if section['heading'] else 'No heading'}...")
-    print(f"      Images: {len(image_descriptions)}")
-    print(f"      Content length: {len(content_text)}")
-    
-    # Generate embedding
-    print(f"      Generating embedding...")
-    embedding = generate_embedding(content_text[:8000])
+    # Slice once: index stores up to 10k chars, embedding input is the first 8k
+    trimmed_text = content_text[:10000]
     
     combined_image_desc = "\n\n".join(image_descriptions) if image_descriptions else None
     all_image_urls = ", ".join(image_urls) if image_urls else None
     
-    if combined_image_desc:
-        print(f"      Image desc length: {len(combined_image_desc)}")
+    if VERBOSE:
+        print(f"\n   Section {section_idx}: {section['heading'][:50] if section['heading'] else 'No heading'}...")
+        print(f"      Images: {len(image_descriptions)}")
+        print(f"      Content length: {len(content_text)}")
+        if combined_image_desc:
+            print(f"      Image desc length: {len(combined_image_desc)}")
     
     chunk = {
         "chunk_id": chunk_id,
@@ -156,8 +190,8 @@ for section_idx, section in enumerate(sections):
         "version": metadata['version'],
         "chunk_index": section_idx,
         "content_type": "section",
-        "content_text": content_text[:10000],
-        "content_vector": embedding,
+        "content_text": trimmed_text,
+        "content_vector": None,
         "has_image": has_image,
         "image_url": all_image_urls,
         "image_description": combined_image_desc,
@@ -166,16 +200,30 @@ for section_idx, section in enumerate(sections):
     }
     
     chunks.append(chunk)
-    time.sleep(0.5)
+    texts.append(trimmed_text[:8000])
+    if len(texts) == EMBEDDING_BATCH_SIZE:
+        embedding_futures.append(embedding_executor.submit(generate_embeddings, texts))
+        texts = []
+
+if texts:
+    embedding_futures.append(embedding_executor.submit(generate_embeddings, texts))
+
+# Collect embeddings in submission order, which matches chunk order
+print(f"\n   Waiting for {len(embedding_futures)} embedding batches...")
+embeddings = [embedding for future in embedding_futures for embedding in future.result()]
+embedding_executor.shutdown()
+for chunk, embedding in zip(chunks, embeddings):
+    chunk['content_vector'] = embedding
 
 print(f"\n4. Created {len(chunks)} chunks")
 
 # Check what we have
-for chunk in chunks:
-    print(f"\n   Chunk: {chunk['chunk_id']}")
-    print(f"      has_image: {chunk['has_image']}")
-    print(f"      image_url: {chunk['image_url'][:50] if chunk['image_url'] else None}...")
-    print(f"      image_description: {chunk['image_description'][:100] if chunk['image_description'] else None}...")
+if VERBOSE:
+    for chunk in chunks:
+        print(f"\n   Chunk: {chunk['chunk_id']}")
+        print(f"      has_image: {chunk['has_image']}")
+        print(f"      image_url: {chunk['image_url'][:50] if chunk['image_url'] else None}...")
+        print(f"      image_description: {chunk['image_description'][:100] if chunk['image_description'] else None}...")
 
 # Upload to index
 print("\n5. Uploading to Azure Search...")
@@ -187,20 +235,34 @@ search_client = SearchClient(
     connection_verify=False
 )
 
-# Delete existing chunks for this page first
-print("   Deleting existing chunks...")
-results = search_client.search(search_text="*", filter=f"page_id eq '17386855'", select=["chunk_id"])
-docs_to_delete = [{"chunk_id": doc["chunk_id"]} for doc in results]
+# Chunk ids are deterministic per version, so re-runs upsert in place;
+# delete every other chunk of the page (older versions, and sections that
+# no longer produce a chunk in this version)
+print("   Removing stale chunks...")
+results = search_client.search(
+    search_text="*",
+    filter=f"page_id eq '{metadata['page_id']}'",
+    select=["chunk_id"]
+)
+current_ids = {chunk["chunk_id"] for chunk in chunks}
+docs_to_delete = [{"chunk_id": doc["chunk_id"]} for doc in results if doc["chunk_id"] not in current_ids]
 if docs_to_delete:
     search_client.delete_documents(documents=docs_to_delete)
-    print(f"   Deleted {len(docs_to_delete)} old chunks")
+    print(f"   Deleted {len(docs_to_delete)} stale chunks")
 
-print("   Uploading new chunks...")
-result = search_client.upload_documents(documents=chunks)
+print("   Merging/uploading new chunks...")
+result = search_client.merge_or_upload_documents(documents=chunks)
 print(f"   Uploaded {len(result)} chunks")
 
 print("\n6. Verifying upload...")
-time.sleep(2)  # Wait for index to update
+# Poll until this version's chunks are searchable (bounded) instead of a fixed wait
+version_filter = f"page_id eq '{metadata['page_id']}' and version eq {metadata['version']}"
+deadline = time.monotonic() + 10
+while time.monotonic() < deadline:
+    count = search_client.search(search_text="*", filter=version_filter, top=0, include_total_count=True).get_count()
+    if count >= len(chunks):
+        break
+    time.sleep(0.2)
 results = search_client.search(search_text="*", filter=f"page_id eq '17386855'", select=["chunk_id", "has_image", "image_description"])
 for doc in results:
     print(f"   {doc['chunk_id']}: has_image={doc.get('has_image')}, img_desc={doc.get('image_description', 'None')[:50] if doc.get('image_description') else 'None'}...")
@@ -2,10 +2,15 @@
 Test semantic search on the indexed content
 Proves that embeddings are stored and working
 """
+import hashlib
+import json
 import os
 import httpx
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from azure.search.documents import SearchClient
+from azure.search.documents.models import VectorizedQuery
 from azure.core.credentials import AzureKeyCredential
 from openai import AzureOpenAI
 
@@ -21,41 +26,48 @@ openai_client = AzureOpenAI(
     azure_endpoint=os.getenv("FOUNDRY_EMBEDDING_ENDPOINT"),
     api_key=os.getenv("FOUNDRY_EMBEDDING_API_KEY"),
     api_version="2024-02-01",
-    http_client=httpx.Client(verify=False)
+    # Pooled HTTP/2 client: concurrent query embeddings share one TLS connection
+    http_client=httpx.Client(
+        verify=False,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    )
+)
+
+# One search client shared by all queries (and threads)
+search_client = SearchClient(
+    endpoint=SEARCH_ENDPOINT,
+    index_name=SEARCH_INDEX_NAME,
+    credential=AzureKeyCredential(SEARCH_API_KEY),
+    connection_verify=False
 )
 
 EMBEDDING_MODEL = os.getenv("FOUNDRY_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
 
+# Query embeddings cached on disk so re-runs skip the embedding API
+EMBEDDING_CACHE_DIR = Path(__file__).parent / ".emb_cache"
 
-def semantic_search(query_text, top_k=5):
-    """
-    Perform semantic search using vector similarity
-    """
-    print(f"\n{'='*70}")
-    print(f"SEMANTIC SEARCH: '{query_text}'")
-    print(f"{'='*70}\n")
+
+def get_query_embedding(query_text):
+    """Return the query embedding, reading/writing the on-disk cache"""
+    key = hashlib.sha1(f"{EMBEDDING_MODEL}\n{query_text}".encode("utf-8")).hexdigest()
+    cache_path = EMBEDDING_CACHE_DIR / f"{key}.json"
+    if cache_path.exists():
+        return json.loads(cache_path.read_text())
     
-    # Generate embedding for the query
-    print("🔄 Generating query embedding...")
     response = openai_client.embeddings.create(
         model=EMBEDDING_MODEL,
         input=query_text
     )
     query_vector = response.data[0].embedding
-    print(f"✅ Query embedding generated ({len(query_vector)} dimensions)\n")
-    
-    # Connect to search service
-    search_client = SearchClient(
-        endpoint=SEARCH_ENDPOINT,
-        index_name=SEARCH_INDEX_NAME,
-        credential=AzureKeyCredential(SEARCH_API_KEY),
-        connection_verify=False
-    )
-    
-    # Perform vector search
-    print(f"🔍 Searching for top {top_k} results...\n")
-    
-    from azure.search.documents.models import VectorizedQuery
+    EMBEDDING_CACHE_DIR.mkdir(exist_ok=True)
+    cache_path.write_text(json.dumps(query_vector))
+    return query_vector
+
+
+def fetch_semantic_results(query_text, top_k=5):
+    """Embed the query and run a pure vector search; returns (query_vector, results)"""
+    query_vector = get_query_embedding(query_text)
     
     vector_query = VectorizedQuery(
         vector=query_vector,
@@ -68,6 +80,31 @@ def semantic_search(query_text, top_k=5):
         vector_queries=[vector_query],
         select=["chunk_id", "page_title", "content_type", "content_text", "has_image", "image_description"]
     )
+    return query_vector, list(results)
+
+
+def fetch_keyword_results(query_text, top_k=3):
+    """Run a regular keyword search; returns the materialized results"""
+    results = search_client.search(
+        search_text=query_text,
+        select=["chunk_id", "page_title", "content_type", "content_text"],
+        top=top_k
+    )
+    return list(results)
+
+
+def semantic_search(query_text, top_k=5, fetched=None):
+    """
+    Perform semantic search using vector similarity.
+    Pass `fetched` (from fetch_semantic_results) to print results fetched elsewhere.
+    """
+    print(f"\n{'='*70}")
+    print(f"SEMANTIC SEARCH: '{query_text}'")
+    print(f"{'='*70}\n")
+    
+    query_vector, results = fetched or fetch_semantic_results(query_text, top_k)
+    print(f"✅ Query embedding generated ({len(query_vector)} dimensions)\n")
+    print(f"🔍 Top {top_k} results:\n")
     
     # Display results
     print("📊 RESULTS:\n")
@@ -87,26 +124,16 @@ def semantic_search(query_text, top_k=5):
     print(f"{'='*70}\n")
 
 
-def keyword_search(query_text, top_k=3):
+def keyword_search(query_text, top_k=3, fetched=None):
     """
-    Perform regular keyword search (non-semantic)
+    Perform regular keyword search (non-semantic).
+    Pass `fetched` (from fetch_keyword_results) to print results fetched elsewhere.
     """
     print(f"\n{'='*70}")
     print(f"KEYWORD SEARCH: '{query_text}'")
     print(f"{'='*70}\n")
     
-    search_client = SearchClient(
-        endpoint=SEARCH_ENDPOINT,
-        index_name=SEARCH_INDEX_NAME,
-        credential=AzureKeyCredential(SEARCH_API_KEY),
-        connection_verify=False
-    )
-    
-    results = search_client.search(
-        search_text=query_text,
-        select=["chunk_id", "page_title", "content_type", "content_text"],
-        top=top_k
-    )
+    results = fetched if fetched is not None else fetch_keyword_results(query_text, top_k)
     
     print("📊 RESULTS:\n")
     for i, result in enumerate(results, 1):
@@ -120,13 +147,22 @@ def keyword_search(query_text, top_k=3):
 
 
 if __name__ == "__main__":
-    # Test 1: Semantic search - understands meaning
-    semantic_search("Who is responsible for project planning and budgets?")
-    
-    # Test 2: Semantic search - finds related concepts
-    semantic_search("What are the project manager's duties?")
-    
+    semantic_queries = [
+        # Test 1: Semantic search - understands meaning
+        "Who is responsible for project planning and budgets?",
+        # Test 2: Semantic search - finds related concepts
+        "What are the project manager's duties?",
+    ]
     # Test 3: Compare with keyword search
-    keyword_search("project manager")
+    keyword_query = "project manager"
+    
+    # The three searches are independent - run them concurrently, print in order
+    with ThreadPoolExecutor(max_workers=len(semantic_queries) + 1) as executor:
+        semantic_futures = [executor.submit(fetch_semantic_results, q) for q in semantic_queries]
+        keyword_future = executor.submit(fetch_keyword_results, keyword_query)
+        
+        for query, future in zip(semantic_queries, semantic_futures):
+            semantic_search(query, fetched=future.result())
+        keyword_search(keyword_query, fetched=keyword_future.result())
     
     print("✅ Embeddings are stored and semantic search is working!")